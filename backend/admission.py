@@ -0,0 +1,203 @@
+"""Admission control for expensive endpoints.
+
+Password endpoints (bcrypt) and uploads are grouped into endpoint classes. Each class has
+  - a per-client token bucket: a client that spends its burst gets 429 until tokens refill
+  - a concurrency limit with a bounded FIFO wait queue: requests beyond the limit wait for
+    a slot, and get 503 at once when the queue is full or after waiting too long
+Both refusals carry Retry-After. Requests outside these classes, such as feed reads, are
+never queued here, so they keep being served while the expensive ones are shed.
+
+Limits are per worker process and configured per class with ADMISSION_<CLASS>_CONCURRENCY,
+_QUEUE, _QUEUE_TIMEOUT (seconds), _RATE (requests per second per client, 0 for no limit)
+and _BURST. ADMISSION_CONTROL=0 turns it off. Clients are told apart by address; behind a proxy,
+FORWARDED_ALLOW_IPS (see serve.py) must trust it so the address comes from X-Forwarded-For.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from cache import TTLCache
+from metrics import REGISTRY, Counter, Gauge
+from serialization import render_json
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") != "0"
+
+# (method, path) -> endpoint class
+ENDPOINT_CLASSES = {
+    ("POST", "/api/auth/login"): "auth",
+    ("POST", "/api/auth/register"): "auth",
+    ("POST", "/api/auth/upload-photo"): "upload",
+    ("POST", "/api/blog/upload-image"): "upload",
+}
+# Per class: concurrency, queue, queue_timeout, rate, burst. Many students share a campus
+# address, so the per-client rates are generous; the concurrency limits do the shedding.
+DEFAULT_LIMITS = {
+    "auth": {"concurrency": 8, "queue": 64, "queue_timeout": 5, "rate": 1, "burst": 20},
+    "upload": {"concurrency": 4, "queue": 16, "queue_timeout": 10, "rate": 0.5, "burst": 10},
+}
+
+admission_admitted = REGISTRY.register(Counter(
+    "admission_admitted_total", "Requests admitted by endpoint class, including those that queued first.",
+    ("class",)))
+admission_queued = REGISTRY.register(Counter(
+    "admission_queued_total", "Requests that had to wait for a slot.", ("class",)))
+admission_shed = REGISTRY.register(Counter(
+    "admission_shed_total", "Requests refused by endpoint class and reason.", ("class", "reason")))
+admission_in_flight = REGISTRY.register(Gauge(
+    "admission_in_flight", "Admitted requests being handled.", ("class",)))
+admission_waiting = REGISTRY.register(Gauge(
+    "admission_queue_depth", "Requests waiting for a slot.", ("class",)))
+
+
+def _limits_from_env(name: str, defaults: dict) -> dict:
+    prefix = f"ADMISSION_{name.upper()}_"
+    return {key: float(os.getenv(prefix + key.upper(), str(value))) for key, value in defaults.items()}
+
+
+class TokenBuckets:
+    """One token bucket per client, refilled at `rate` tokens a second up to `burst`."""
+
+    def __init__(self, rate: float, burst: float, maxsize: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        # A bucket left alone this long is full again, the same as having none
+        self._buckets = TTLCache(maxsize, ttl=burst / rate if rate > 0 else 0)
+
+    def take(self, client) -> float:
+        """Take a token; returns 0 if one was available, else the seconds until there is one."""
+        if self.rate <= 0:
+            return 0  # rate limiting is off for this class
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets.set(client, (tokens, now))
+            return (1 - tokens) / self.rate
+        self._buckets.set(client, (tokens - 1, now))
+        return 0
+
+
+class ConcurrencyLimit:
+    """At most `limit` holders; up to `queue_size` more wait in FIFO order."""
+
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self._waiters = deque()
+
+    @property
+    def queue_full(self) -> bool:
+        return len(self._waiters) >= self.queue_size
+
+    def try_acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        return False
+
+    async def wait(self, timeout: float) -> bool:
+        """Queue for a slot; False if none came within timeout. Check queue_full first."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as the request went away: pass it on
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot moves to the waiter; active stays the same
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+
+class EndpointClass:
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: float, rate: float, burst: float):
+        self.name = name
+        self.queue_timeout = queue_timeout
+        self.buckets = TokenBuckets(rate, burst)
+        self.slots = ConcurrencyLimit(int(concurrency), int(queue))
+
+    def retry_after_busy(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+
+def _reject(status: int, detail: str, retry_after: float):
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+    ]
+    return status, headers, render_json({"detail": detail})
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying the endpoint class limits before routing."""
+
+    def __init__(self, app, classes: dict = None, endpoint_classes: dict = ENDPOINT_CLASSES):
+        self.app = app
+        if classes is None:
+            classes = {
+                name: EndpointClass(name, **_limits_from_env(name, defaults))
+                for name, defaults in DEFAULT_LIMITS.items()
+            }
+        self.classes = classes
+        self.endpoint_classes = endpoint_classes
+
+    def _classify(self, scope):
+        name = self.endpoint_classes.get((scope["method"], scope["path"].rstrip("/") or "/"))
+        return self.classes.get(name) if name else None
+
+    async def __call__(self, scope, receive, send):
+        endpoint = self._classify(scope) if scope["type"] == "http" and ADMISSION_CONTROL else None
+        if endpoint is None:
+            await self.app(scope, receive, send)
+            return
+        client = (scope.get("client") or ("unknown",))[0]
+        rejection = await self._admit(endpoint, client)
+        if rejection is not None:
+            status, headers, body = rejection
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+        admission_in_flight.inc(endpoint.name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_in_flight.dec(endpoint.name)
+            endpoint.slots.release()
+
+    async def _admit(self, endpoint: EndpointClass, client):
+        """None once a slot is held, else the (status, headers, body) to refuse with."""
+        wait = endpoint.buckets.take(client)
+        if wait:
+            admission_shed.inc(endpoint.name, "rate_limited")
+            return _reject(429, "Too many requests, please retry later", wait)
+        if not endpoint.slots.try_acquire():
+            if endpoint.slots.queue_full:
+                admission_shed.inc(endpoint.name, "queue_full")
+                return _reject(503, "Server is busy, please retry later", endpoint.retry_after_busy())
+            admission_queued.inc(endpoint.name)
+            admission_waiting.inc(endpoint.name)
+            try:
+                admitted = await endpoint.slots.wait(endpoint.queue_timeout)
+            finally:
+                admission_waiting.dec(endpoint.name)
+            if not admitted:
+                admission_shed.inc(endpoint.name, "queue_timeout")
+                return _reject(503, "Server is busy, please retry later", endpoint.retry_after_busy())
+        admission_admitted.inc(endpoint.name)
+        return None
@@ -0,0 +1,57 @@
+"""A stand-in for the Cloudinary SDK so benchmarks never touch the network.
+
+install() must run before the app is imported. Calls block for `latency` seconds, like the
+real synchronous SDK, so the thread-pool paths in storage.py and paper_urls.py are still
+exercised.
+"""
+import sys
+import time
+import types
+import uuid
+
+
+class NotFound(Exception):
+    pass
+
+
+def install(latency: float = 0.05, papers: int = 200):
+    base = "https://res.cloudinary.com/bench"
+    known = {f"student_hub/papers/paper-{i}.pdf" for i in range(papers)}
+
+    def config(**kwargs):
+        pass
+
+    def resource(public_id, **kwargs):
+        time.sleep(latency)
+        if public_id not in known:
+            raise NotFound(public_id)
+        return {"public_id": public_id, "secure_url": f"{base}/raw/upload/{public_id}"}
+
+    def resources(prefix="", max_results=500, next_cursor=None, **kwargs):
+        time.sleep(latency)
+        ids = sorted(p for p in known if p.startswith(prefix))
+        start = int(next_cursor or 0)
+        page = ids[start:start + max_results]
+        result = {"resources": [{"public_id": p, "secure_url": f"{base}/raw/upload/{p}"} for p in page]}
+        if start + max_results < len(ids):
+            result["next_cursor"] = str(start + max_results)
+        return result
+
+    def upload(file, folder="", **kwargs):
+        time.sleep(latency)
+        return {"secure_url": f"{base}/image/upload/{folder}{uuid.uuid4().hex}"}
+
+    cloudinary = types.ModuleType("cloudinary")
+    cloudinary.config = config
+    cloudinary.api = types.ModuleType("cloudinary.api")
+    cloudinary.api.resource = resource
+    cloudinary.api.resources = resources
+    cloudinary.uploader = types.ModuleType("cloudinary.uploader")
+    cloudinary.uploader.upload = upload
+    cloudinary.exceptions = types.ModuleType("cloudinary.exceptions")
+    cloudinary.exceptions.NotFound = NotFound
+    for name, module in (("cloudinary", cloudinary), ("cloudinary.api", cloudinary.api),
+                         ("cloudinary.uploader", cloudinary.uploader),
+                         ("cloudinary.exceptions", cloudinary.exceptions)):
+        sys.modules[name] = module
+    return sorted(p.rsplit("/", 1)[1] for p in known)
@@ -0,0 +1,40 @@
+"""Shared helpers for the benchmark scripts."""
+import math
+import time
+
+
+def percentiles(samples, points=(50, 95, 99)) -> dict:
+    """Nearest-rank percentiles of `samples` (seconds), reported in milliseconds."""
+    if not samples:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(samples)
+    result = {}
+    for p in points:
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        result[f"p{p}"] = round(ordered[rank - 1] * 1000, 2)
+    return result
+
+
+def summarize(samples, errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        **percentiles(samples),
+    }
+
+
+async def timed_response(client, method: str, url: str, **kwargs):
+    """Send one request and return (latency_seconds, response), response None on failure."""
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except Exception:
+        response = None
+    return time.perf_counter() - started, response
+
+
+async def timed_request(client, method: str, url: str, **kwargs):
+    """Send one request and return (latency_seconds, ok)."""
+    latency, response = await timed_response(client, method, url, **kwargs)
+    return latency, response is not None and response.status_code < 500
@@ -0,0 +1,74 @@
+"""Feed latency while logins are hammered.
+
+Measures GET /api/blog/posts latency on its own, then again while a burst of concurrent
+logins runs against the same server. With bcrypt off the event loop the two feed
+distributions should be close; with bcrypt on the loop the second one balloons.
+
+Start the API with admission control off, since every login comes from this one address
+and would otherwise be rate limited (shed logins are counted as errors), then run from the
+backend directory:
+    ADMISSION_CONTROL=0 uvicorn main:app --port 8000
+    python -m benchmarks.login_burst --base-url http://localhost:8000 --duration 10
+
+Requires httpx (pip install -r benchmarks/requirements.txt). Prints a JSON report.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from benchmarks.common import summarize, timed_response
+
+
+async def _loop(client, method, url, deadline, samples, errors, **kwargs):
+    while time.perf_counter() < deadline:
+        latency, response = await timed_response(client, method, url, **kwargs)
+        # 429 and 503 are admission control shedding the request, not the work being measured
+        if response is not None and response.status_code < 400:
+            samples.append(latency)
+        else:
+            errors.append(1)
+
+
+async def _phase(client, duration, feed_clients, login_clients, credentials):
+    deadline = time.perf_counter() + duration
+    feed, feed_errors, logins, login_errors = [], [], [], []
+    tasks = [
+        _loop(client, "GET", "/api/blog/posts", deadline, feed, feed_errors)
+        for _ in range(feed_clients)
+    ] + [
+        _loop(client, "POST", "/api/auth/login", deadline, logins, login_errors, json=credentials)
+        for _ in range(login_clients)
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    report = {"feed": summarize(feed, len(feed_errors), elapsed)}
+    if login_clients:
+        report["login"] = summarize(logins, len(login_errors), elapsed)
+    return report
+
+
+async def main(args):
+    credentials = {"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "password": "bench-password"}
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        await client.post("/api/auth/register", json={"name": "Benchmark", **credentials})
+        baseline = await _phase(client, args.duration, args.feed_clients, 0, credentials)
+        burst = await _phase(client, args.duration, args.feed_clients, args.login_clients, credentials)
+        health = (await client.get("/health")).json()
+    print(json.dumps({
+        "baseline": baseline,
+        "during_login_burst": burst,
+        "password_hashing": health.get("password_hashing"),
+    }, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per phase")
+    parser.add_argument("--feed-clients", type=int, default=8)
+    parser.add_argument("--login-clients", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
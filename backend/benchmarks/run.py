@@ -0,0 +1,286 @@
+"""Reproducible benchmarks for the API.
+
+Boots the app in this process (through httpx's ASGI transport, lifespan included) with the
+Cloudinary SDK replaced by benchmarks/cloudinary_stub.py, seeds a dedicated database with
+scripts/generate_data.py, then runs each scenario for --duration seconds with --concurrency
+clients. The JSON report has throughput and p50/p95/p99 latency per route, so runs on two
+commits can be diffed.
+
+Run from the backend directory against a local mongod:
+    python -m benchmarks.run --mongo-uri mongodb://localhost:27017 --posts 20000 > before.json
+or against a throwaway mongod (pip install pymongo_inmemory):
+    python -m benchmarks.run --inmemory --scenarios feed,like_storm --concurrency 64
+
+The --db database (default student_hub_bench) is wiped and reseeded unless --no-seed is given.
+Scenarios: feed, like_storm, login_burst, comments.
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict, deque
+
+import httpx
+
+from benchmarks import cloudinary_stub
+from benchmarks.common import summarize, timed_response
+
+SEARCH_WORDS = ["python", "neural", "gate", "interview", "graph", "network", "resume", "5g"]
+
+
+class Context:
+    """What the scenarios pick their requests from."""
+
+    def __init__(self, rng, post_ids, categories, emails, password, tokens, papers):
+        self.rng = rng
+        self.post_ids = post_ids  # most liked first
+        self.categories = categories
+        self.emails = emails
+        self.password = password
+        self.tokens = tokens
+        self.papers = papers
+        self.cursors = deque(maxlen=200)
+        self.threads = deque(maxlen=200)  # (post_id, comment_id) of comments with replies
+
+    def hot_post(self) -> str:
+        """A post id, skewed heavily towards the most popular posts."""
+        index = int(self.rng.paretovariate(1.2)) - 1
+        return self.post_ids[min(index, len(self.post_ids) - 1)]
+
+    def any_post(self) -> str:
+        return self.rng.choice(self.post_ids)
+
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def __call__(self, client, label: str, method: str, url: str, **kwargs):
+        latency, response = await timed_response(client, method, url, **kwargs)
+        if response is None or response.status_code >= 400:
+            self.errors[label] += 1
+        else:
+            self.samples[label].append(latency)
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        labels = sorted(set(self.samples) | set(self.errors))
+        every = [s for label in labels for s in self.samples[label]]
+        return {
+            "total": summarize(every, sum(self.errors.values()), elapsed),
+            "routes": {label: summarize(self.samples[label], self.errors[label], elapsed) for label in labels},
+        }
+
+
+async def feed(ctx, client, request):
+    """Anonymous browsing: feed pages, post detail, categories, search, facets, papers."""
+    roll = ctx.rng.random()
+    if roll < 0.45 or (roll < 0.6 and not ctx.cursors):
+        response = await request(client, "GET /api/blog/posts", "GET", "/api/blog/posts")
+        if response is not None and response.headers.get("X-Next-Cursor"):
+            ctx.cursors.append(response.headers["X-Next-Cursor"])
+    elif roll < 0.6:
+        cursor = ctx.rng.choice(ctx.cursors)
+        response = await request(client, "GET /api/blog/posts?cursor", "GET", "/api/blog/posts",
+                                 params={"cursor": cursor})
+        if response is not None and response.headers.get("X-Next-Cursor"):
+            ctx.cursors.append(response.headers["X-Next-Cursor"])
+    elif roll < 0.75:
+        await request(client, "GET /api/blog/posts/{post_id}", "GET", f"/api/blog/posts/{ctx.hot_post()}")
+    elif roll < 0.85:
+        category = ctx.rng.choice(ctx.categories)
+        await request(client, "GET /api/blog/posts/category/{category}", "GET",
+                      f"/api/blog/posts/category/{category}")
+    elif roll < 0.9:
+        await request(client, "GET /api/blog/search", "GET", "/api/blog/search",
+                      params={"q": ctx.rng.choice(SEARCH_WORDS)})
+    elif roll < 0.95:
+        await request(client, "GET /api/blog/facets", "GET", "/api/blog/facets")
+    else:
+        await request(client, "GET /api/papers/{filename}", "GET", f"/api/papers/{ctx.rng.choice(ctx.papers)}")
+
+
+async def like_storm(ctx, client, request):
+    """Signed-in users toggling likes on a few hot posts while the feed is read."""
+    if ctx.rng.random() < 0.8:
+        await request(client, "POST /api/blog/posts/{post_id}/like", "POST",
+                      f"/api/blog/posts/{ctx.hot_post()}/like", headers=ctx.auth())
+    else:
+        await request(client, "GET /api/blog/posts", "GET", "/api/blog/posts")
+
+
+async def login_burst(ctx, client, request):
+    """Logins (bcrypt) competing with feed reads."""
+    if ctx.rng.random() < 0.3:
+        await request(client, "POST /api/auth/login", "POST", "/api/auth/login",
+                      json={"email": ctx.rng.choice(ctx.emails), "password": ctx.password})
+    else:
+        await request(client, "GET /api/blog/posts", "GET", "/api/blog/posts")
+
+
+async def comments(ctx, client, request):
+    """Reading and writing comment threads on popular posts."""
+    roll = ctx.rng.random()
+    post_id = ctx.hot_post()
+    if roll < 0.4 or (roll < 0.6 and not ctx.threads):
+        response = await request(client, "GET /api/blog/posts/{post_id}/comments", "GET",
+                                 f"/api/blog/posts/{post_id}/comments")
+        if response is not None and response.status_code == 200:
+            ctx.threads.extend((post_id, c["id"]) for c in response.json() if c.get("reply_count"))
+    elif roll < 0.6:
+        post_id, comment_id = ctx.rng.choice(ctx.threads)
+        await request(client, "GET /api/blog/posts/{post_id}/comments?parent_id", "GET",
+                      f"/api/blog/posts/{post_id}/comments", params={"parent_id": comment_id})
+    elif roll < 0.9 or not ctx.threads:
+        await request(client, "POST /api/blog/posts/{post_id}/comments", "POST",
+                      f"/api/blog/posts/{post_id}/comments", headers=ctx.auth(),
+                      json={"text": "Benchmark comment"})
+    else:
+        post_id, comment_id = ctx.rng.choice(ctx.threads)
+        await request(client, "POST /api/blog/posts/{post_id}/comments (reply)", "POST",
+                      f"/api/blog/posts/{post_id}/comments", headers=ctx.auth(),
+                      json={"text": "Benchmark reply", "parent_id": comment_id})
+
+
+SCENARIOS = {
+    "feed": feed,
+    "like_storm": like_storm,
+    "login_burst": login_burst,
+    "comments": comments,
+}
+
+
+async def run_scenario(step, ctx, client, concurrency: int, duration: float) -> dict:
+    request = Recorder()
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await step(ctx, client, request)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return request.report(time.perf_counter() - started)
+
+
+async def seed(db, args):
+    from scripts.generate_data import generate
+    await db.client.drop_database(db.name)
+    # generate() reports progress on stdout, which is reserved for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        await generate(argparse.Namespace(
+            users=args.users, posts=args.posts, days=365, mean_likes=15, mean_comments=3,
+            max_comments=500, reply_ratio=0.3, batch_size=1000, parallel=4, seed=args.seed,
+            password=args.password, email_domain="bench.example.com", drop=False,
+        ))
+
+
+async def benchmark(args, papers: list) -> dict:
+    # Imported here: db.py reads MONGO_URI/MONGO_DB and the app must see the Cloudinary stub.
+    # Every request comes from one address, so admission control would rate limit the logins
+    # and the scenarios would measure shed requests; set ADMISSION_CONTROL=1 to measure it on.
+    os.environ.setdefault("ADMISSION_CONTROL", "0")
+    main = importlib.import_module("main")
+    from db import db
+
+    if args.seed_data:
+        await seed(db, args)
+    report = {"meta": {
+        "commit": _git_commit(),
+        "users": await db.users.count_documents({}),
+        "posts": await db.blog_posts.count_documents({}),
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "seed": args.seed,
+    }, "scenarios": {}}
+    post_ids = [str(p["_id"]) async for p in db.blog_posts.find({}, {"_id": 1}).sort("like_count", -1).limit(1000)]
+    categories = await db.blog_posts.distinct("category")
+    emails = [u["email"] async for u in db.users.find({}, {"email": 1}).limit(1000)]
+    if not post_ids or not emails:
+        raise SystemExit("The benchmark database is empty; run without --no-seed")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            tokens = []
+            for email in emails[:args.auth_users]:
+                response = await client.post("/api/auth/login", json={"email": email, "password": args.password})
+                response.raise_for_status()
+                tokens.append(response.json()["access_token"])
+            ctx = Context(random.Random(args.seed), post_ids, categories, emails, args.password, tokens, papers)
+            for name in args.scenarios:
+                print(f"Running {name}...", file=sys.stderr)
+                report["scenarios"][name] = await run_scenario(
+                    SCENARIOS[name], ctx, client, args.concurrency, args.duration
+                )
+    return report
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def _mongo(args):
+    """Point db.py at the benchmark database, starting a throwaway mongod for --inmemory."""
+    if not args.inmemory:
+        os.environ["MONGO_URI"] = args.mongo_uri
+        os.environ["MONGO_DB"] = args.db
+        yield
+        return
+    from pymongo_inmemory import Mongod
+    with Mongod() as mongod:
+        os.environ["MONGO_URI"] = mongod.connection_string
+        os.environ["MONGO_DB"] = args.db
+        yield
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--inmemory", action="store_true", help="start a throwaway mongod with pymongo_inmemory")
+    parser.add_argument("--db", default="student_hub_bench")
+    parser.add_argument("--no-seed", dest="seed_data", action="store_false", help="reuse the existing dataset")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        type=lambda value: [s for s in value.split(",") if s])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--auth-users", type=int, default=20, help="users logged in for authenticated requests")
+    parser.add_argument("--cloudinary-latency", type=float, default=0.05, help="seconds per stubbed SDK call")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    papers = cloudinary_stub.install(args.cloudinary_latency)
+    with _mongo(args):
+        report = asyncio.run(benchmark(args, papers))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Cost of turning post documents into a JSON response body.
+
+Compares, for feeds of 50, 200 and 1000 posts:
+  pydantic   what FastAPI does for a returned dict: validate against the response_model,
+             dump it in JSON mode and encode with the stdlib (JSONResponse)
+  fast       serialization.render_json on the converter output, which skips re-validation
+             and uses orjson when it is installed
+  fast-stdlib  the same without orjson, i.e. the fallback path
+
+Run from the backend directory (no database needed):
+    python -m benchmarks.serialization --repeat 20
+Prints a JSON report of median milliseconds per response.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+import serialization
+from models.blog import BlogPostResponse, BlogPostSummary
+from serialization import post_response, post_summary, render_json
+
+WORDS = "graph tree array queue stack heap model layer signal network exam notes".split()
+
+
+def make_posts(count: int, likes_per_post: int, rng: random.Random) -> list:
+    now = datetime.utcnow()
+    posts = []
+    for i in range(count):
+        content = " ".join(rng.choice(WORDS) for _ in range(200))
+        posts.append({
+            "_id": ObjectId(),
+            "type": rng.choice(["note", "job", "thread"]),
+            "title": f"Post {i} about " + " ".join(rng.sample(WORDS, 3)),
+            "excerpt": " ".join(rng.choice(WORDS) for _ in range(20)),
+            "author": f"Student {rng.randint(1, 500)}",
+            "date": now - timedelta(minutes=i),
+            "category": rng.choice(["AI-ML", "Programming", "Jobs", "Notes"]),
+            "read_time": "3 min read",
+            "image": "https://images.unsplash.com/photo-1506744038136-46273834b3fb",
+            "tags": rng.sample(WORDS, 3),
+            "like_count": rng.randint(0, 1000),
+            "comment_count": rng.randint(0, 50),
+            "content": content,
+            "content_preview": content[:180] + "...",
+            "likes": [
+                {"user_id": str(ObjectId()), "user_name": f"Student {j}", "liked_at": now}
+                for j in range(likes_per_post)
+            ],
+        })
+    return posts
+
+
+def _pydantic_path(adapter):
+    def render(content):
+        validated = adapter.validate_python(content)
+        return json.dumps(
+            adapter.dump_python(validated, mode="json"),
+            ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+        ).encode("utf-8")
+    return render
+
+
+def _fast_stdlib(content):
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return render_json(content)
+    finally:
+        serialization.orjson = orjson
+
+
+def _median_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="50,200,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--likes", type=int, default=20, help="likes carried by each full post")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    shapes = {
+        "summary": (post_summary, lambda post: (post,), TypeAdapter(List[BlogPostSummary])),
+        "full": (post_response, lambda post: (post, post["likes"]), TypeAdapter(List[BlogPostResponse])),
+    }
+    report = {"orjson": serialization.orjson is not None, "results": {}}
+    for size in (int(s) for s in args.sizes.split(",")):
+        posts = make_posts(size, args.likes, rng)
+        for shape, (convert, convert_args, adapter) in shapes.items():
+            paths = {
+                "pydantic": _pydantic_path(adapter),
+                "fast": render_json,
+                "fast-stdlib": _fast_stdlib,
+            }
+            results = {}
+            for name, render in paths.items():
+                # Conversion from documents is timed too: every path has to do it
+                results[name] = _median_ms(lambda: render([convert(*convert_args(p)) for p in posts]), args.repeat)
+            results["speedup"] = round(results["pydantic"] / results["fast"], 2) if results["fast"] else None
+            report["results"][f"{shape}/{size}"] = results
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
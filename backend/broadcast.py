@@ -0,0 +1,121 @@
+"""Cache invalidations and live events shared between worker processes.
+
+Every worker keeps its own in-process caches (feed responses, user documents) and its own
+live event subscribers. Writes go through broadcaster.publish(kind, payload), which applies
+the message in this worker at once and, with CACHE_BROADCAST=1 (set by serve.py when it
+starts more than one worker), also appends it to a small capped collection. Each worker
+tails that collection with a tailable cursor and applies the messages written by the
+others, typically within milliseconds. No broker is needed besides MongoDB itself.
+
+A message that can't be sent is logged and counted; the cache TTLs bound how long another
+worker can then serve the stale entry.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+from datetime import timedelta
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+from metrics import REGISTRY, Counter
+
+logger = logging.getLogger(__name__)
+
+CACHE_BROADCAST = os.getenv("CACHE_BROADCAST") == "1"
+CHANNEL_COLLECTION = "cache_broadcast"
+CHANNEL_SIZE_BYTES = 4 * 1024 * 1024
+# After a cursor restart, messages this old are read again (and skipped if already seen)
+RESUME_WINDOW = timedelta(seconds=5)
+
+broadcast_messages = REGISTRY.register(Counter(
+    "broadcast_messages_total", "Messages exchanged with other workers.", ("direction", "kind")))
+broadcast_failures = REGISTRY.register(Counter(
+    "broadcast_send_failures_total", "Messages that could not be sent to other workers."))
+
+
+class Broadcaster:
+    def __init__(self, enabled: bool = CACHE_BROADCAST, collection_name: str = CHANNEL_COLLECTION):
+        self.enabled = enabled
+        self.collection_name = collection_name
+        # Tells this worker's own messages apart when they come back through the channel
+        self.origin = str(ObjectId())
+        self._handlers = {}
+        self._collection = None
+        self._sending = set()
+        self._since = None
+        self._seen = deque(maxlen=1000)
+
+    def subscribe(self, kind: str, handler):
+        """Call handler(payload) for every message of this kind, local or from another worker."""
+        self._handlers[kind] = handler
+
+    def publish(self, kind: str, payload=None):
+        """Apply a message here and send it to the other workers. Payloads must be BSON-encodable."""
+        self._handlers[kind](payload)
+        if self._collection is not None:
+            task = asyncio.ensure_future(self._send(kind, payload))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, kind: str, payload):
+        try:
+            await self._collection.insert_one({"kind": kind, "payload": payload, "origin": self.origin})
+            broadcast_messages.inc("sent", kind)
+        except Exception:
+            broadcast_failures.inc()
+            logger.exception("Could not broadcast %s message", kind)
+
+    async def open(self, db):
+        """Create the channel if needed and start sending to it."""
+        try:
+            await db.create_collection(self.collection_name, capped=True, size=CHANNEL_SIZE_BYTES)
+        except CollectionInvalid:
+            pass  # another worker created it
+        collection = db[self.collection_name]
+        if not (await collection.options()).get("capped"):
+            raise RuntimeError(f"{self.collection_name} must be a capped collection; drop it to have it recreated")
+        self._collection = collection
+        self._since = ObjectId()
+        # Gives every worker's cursor a first match: tailable cursors with none die at once
+        await self._send("hello", None)
+
+    def _receive(self, message: dict):
+        if message["_id"] in self._seen:
+            return
+        self._seen.append(message["_id"])
+        if message.get("origin") == self.origin:
+            return
+        handler = self._handlers.get(message.get("kind"))
+        if handler is None:
+            return
+        broadcast_messages.inc("received", message["kind"])
+        try:
+            handler(message.get("payload"))
+        except Exception:
+            logger.exception("Could not apply broadcast %s message", message["kind"])
+
+    async def run(self, retry_delay: float = 1):
+        """Apply other workers' messages until cancelled. Call open() first."""
+        collection = self._collection
+        while True:
+            try:
+                cursor = collection.find({"_id": {"$gte": self._since}}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for message in cursor:
+                        self._receive(message)
+                        self._since = ObjectId.from_datetime(message["_id"].generation_time - RESUME_WINDOW)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Broadcast channel cursor failed; reopening")
+            await asyncio.sleep(retry_delay)
+
+    async def stop(self):
+        """Wait for messages still being sent."""
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+        self._collection = None
+
+
+broadcaster = Broadcaster()
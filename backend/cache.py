@@ -0,0 +1,114 @@
+import hashlib
+import time
+from collections import OrderedDict, namedtuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """A bounded LRU cache whose entries expire `ttl` seconds after they are set."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def keys(self):
+        return list(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "headers"])
+
+
+class ResponseCache:
+    """Serialized JSON responses keyed by route and query parameters, invalidated by tag.
+
+    Each entry is stored with the tags it depends on (e.g. "feed:head" or "post:<id>"), so a
+    write only drops the responses that could have changed. Responses being built while an
+    invalidation happens are not stored, so a slow read can't reinsert stale data.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 30):
+        self.maxsize = maxsize
+        self._entries = TTLCache(maxsize, ttl)
+        self._tags = {}
+        self._prune_at = 4 * maxsize
+        self.generation = 0
+
+    def get(self, key):
+        item = self._entries.get(key)
+        return None if item is None else item[0]
+
+    def put(self, key, body: bytes, tags, headers: dict = None, generation: int = None):
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        entry = CachedResponse(body, etag, headers or {})
+        if generation is not None and generation != self.generation:
+            return entry
+        tags = frozenset(tags)
+        self._entries.set(key, (entry, tags))
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        if len(self._tags) > self._prune_at:
+            self._prune_tags()
+        return entry
+
+    def _prune_tags(self):
+        # Entries evicted by LRU or expiry leave their keys behind in the tag index
+        self._tags = {}
+        for key in self._entries.keys():
+            item = self._entries.get(key)
+            if item is not None:
+                for tag in item[1]:
+                    self._tags.setdefault(tag, set()).add(key)
+        # Live entries can carry many tags each; waiting for the index to double again keeps
+        # the rebuild's cost spread over at least as many puts as it had tags to rebuild
+        self._prune_at = max(4 * self.maxsize, 2 * len(self._tags))
+
+    def invalidate(self, *tags):
+        self.generation += 1
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                self._entries.pop(key)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._tags.clear()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
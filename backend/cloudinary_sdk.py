@@ -0,0 +1,33 @@
+"""The optional Cloudinary SDK, imported and configured on first use.
+
+Importing the SDK (and the HTTP stack under it) is a noticeable part of a cold start, and
+most requests never touch Cloudinary, so nothing imports it at startup. get_cloudinary()
+imports it and applies the CLOUDINARY_* credentials once; cloudinary_installed() answers
+whether it is available without importing it.
+"""
+import importlib.util
+import os
+import sys
+from functools import lru_cache
+
+
+def cloudinary_installed() -> bool:
+    return "cloudinary" in sys.modules or importlib.util.find_spec("cloudinary") is not None
+
+
+@lru_cache(maxsize=None)
+def get_cloudinary():
+    """The configured cloudinary module (with api, uploader and exceptions loaded), or None."""
+    try:
+        import cloudinary  # type: ignore
+        import cloudinary.api  # type: ignore
+        import cloudinary.exceptions  # type: ignore
+        import cloudinary.uploader  # type: ignore
+    except ImportError:
+        return None
+    cloudinary.config(
+        cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
+        api_key=os.getenv('CLOUDINARY_API_KEY'),
+        api_secret=os.getenv('CLOUDINARY_API_SECRET')
+    )
+    return cloudinary
@@ -0,0 +1,36 @@
+"""Building post_comments documents outside the request path.
+
+Kept apart from routes/blog.py so the comments migration can use it without importing the
+router, the event bus and the like buffer.
+"""
+from datetime import datetime
+from bson import ObjectId
+
+
+def comment_docs_from_embedded(post_id: ObjectId, comments: list) -> list:
+    """Turn embedded comments (with nested `replies`, as in SAMPLE_POSTS) into post_comments documents."""
+    docs = []
+    for comment in comments or []:
+        replies = comment.get("replies") or []
+        parent = {
+            "_id": ObjectId(),
+            "post_id": post_id,
+            "parent_id": None,
+            "user_id": comment["user_id"],
+            "user_name": comment["user_name"],
+            "text": comment["text"],
+            "created_at": comment.get("created_at") or datetime.utcnow(),
+            "reply_count": len(replies),
+        }
+        docs.append(parent)
+        for reply in replies:
+            docs.append({
+                "_id": ObjectId(),
+                "post_id": post_id,
+                "parent_id": parent["_id"],
+                "user_id": reply["user_id"],
+                "user_name": reply["user_name"],
+                "text": reply["text"],
+                "created_at": reply.get("created_at") or parent["created_at"],
+            })
+    return docs
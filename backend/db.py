@@ -1,12 +1,38 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import logging
 import os
 from dotenv import load_dotenv
+from metrics import CommandMetrics
+from settings import MongoSettings
 
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
-MONGO_URI = os.getenv("MONGO_URI")
-client = AsyncIOMotorClient(MONGO_URI)
-db_name = os.getenv("MONGO_DB")
+logger = logging.getLogger(__name__)
+
+mongo_settings = MongoSettings()
+MONGO_URI = mongo_settings.uri
+# Per-command latency for /metrics
+client = AsyncIOMotorClient(MONGO_URI, event_listeners=[CommandMetrics()], **mongo_settings.client_options())
+db_name = mongo_settings.db_name
 if not db_name:
     raise ValueError("MONGO_DB environment variable is not set")
-db = client[db_name]
\ No newline at end of file
+db = client[db_name]
+# Feed, category and search reads, which tolerate replica lag
+feed_db = db.with_options(read_preference=mongo_settings.feed_read_preference)
+
+
+async def warm_up(connections: int = mongo_settings.min_pool_size):
+    """Ping the server, then open `connections` pooled connections before serving traffic.
+
+    Concurrent pings each check out their own connection, so the pool is filled now instead
+    of by the first requests after a deploy (minPoolSize alone fills it in the background).
+    """
+    await client.admin.command("ping")
+    if connections > 1:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(connections)))
+    logger.info("MongoDB connection pool warmed with %d connections", max(connections, 1))
+
+
+def close():
+    client.close()
@@ -0,0 +1,67 @@
+"""Authentication dependency shared by every protected route.
+
+Verified tokens are remembered until they expire, and user documents are cached for a
+few seconds, so an authenticated request usually costs neither a signature check nor a
+MongoDB round trip. Routes that change a user must call invalidate_user().
+"""
+import os
+import time
+import jwt
+from bson import ObjectId
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from broadcast import broadcaster
+from cache import TTLCache
+from db import db
+
+SECRET_KEY = os.getenv("JWT_SECRET", "your_secret_key")  # Replace with a secure key in production
+ALGORITHM = "HS256"
+
+security = HTTPBearer()
+
+# token -> user id, each entry expiring with its token
+token_cache = TTLCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "2048")), ttl=0)
+# user id -> user document without the password
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "30")),
+)
+# Dropped in every worker when a user changes
+broadcaster.subscribe("user", user_cache.pop)
+
+
+def verify_token(token: str) -> str:
+    """Return the user id a token was issued for, or raise 401."""
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    user_id = payload.get("sub")
+    if not user_id or not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(token, user_id, ttl=expires_in)
+    return user_id
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """The authenticated user's document, with `_id` as a string and no password."""
+    user_id = verify_token(credentials.credentials)
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, {"password": 0})
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        user["_id"] = str(user["_id"])
+        user_cache.set(user_id, user)
+    return dict(user)
+
+
+def invalidate_user(user_id: str):
+    broadcaster.publish("user", user_id)
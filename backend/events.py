@@ -0,0 +1,166 @@
+"""Live updates pushed to browsers over Server-Sent Events.
+
+The blog write paths publish small events (a new post, changed like or comment counts, a
+new comment) to an in-process EventBus, which fans them out to every connected client.
+Each client has a bounded queue: one that falls EVENTS_QUEUE_SIZE events behind is
+disconnected with a final "resync" event rather than letting its backlog grow, and
+EventSource reconnects it.
+
+With EVENTS_CHANGE_STREAMS=1 and a replica set, events are read from MongoDB change
+streams instead of being published by the handlers, so writes made by other processes
+are pushed too. Without a replica set it falls back to in-process publishing, which with
+several workers goes through broadcast.py so clients of every worker get the event.
+"""
+import asyncio
+import itertools
+import logging
+import os
+from pymongo.errors import OperationFailure
+from broadcast import broadcaster
+from metrics import REGISTRY, Counter, Gauge
+from serialization import comment_response, post_summary, render_json
+
+logger = logging.getLogger(__name__)
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_MAX_CLIENTS = int(os.getenv("EVENTS_MAX_CLIENTS", "1000"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+
+_RESYNC = object()
+
+events_subscribers = REGISTRY.register(Gauge(
+    "events_subscribers", "Clients connected to the live event stream."))
+events_published = REGISTRY.register(Counter(
+    "events_published_total", "Live events published.", ("type",)))
+events_dropped = REGISTRY.register(Counter(
+    "events_slow_consumers_dropped_total", "Clients disconnected for falling too far behind."))
+
+
+def post_created(post: dict) -> dict:
+    return {"type": "post.created", "post": post_summary(post)}
+
+
+def post_updated(post_id, **counts) -> dict:
+    """Changed like_count and/or comment_count of a post."""
+    return {"type": "post.updated", "post_id": str(post_id), **counts}
+
+
+def comment_added(comment: dict) -> dict:
+    return {"type": "comment.added", "post_id": str(comment["post_id"]), "comment": comment_response(comment)}
+
+
+class Subscription:
+    def __init__(self, maxsize: int):
+        self.queue = asyncio.Queue(maxsize)
+
+    async def get(self):
+        """The next event, or None once the subscriber has been dropped."""
+        item = await self.queue.get()
+        return None if item is _RESYNC else item
+
+
+class EventBus:
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE, max_clients: int = EVENTS_MAX_CLIENTS):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+        # Set while a change stream is the source of events; handlers' publish() is then a no-op
+        self.change_streams = False
+
+    def subscribe(self):
+        """A new Subscription, or None when max_clients are already connected."""
+        if len(self._subscribers) >= self.max_clients:
+            return None
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        events_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            events_subscribers.dec()
+
+    def publish(self, event: dict):
+        """Called by the write paths."""
+        if not self.change_streams:
+            broadcaster.publish("event", event)
+
+    def _fan_out(self, event: dict):
+        events_published.inc(event["type"])
+        message = (next(self._ids), render_json(event))
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too slow to keep up: replace its backlog with a resync marker and let it go
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(_RESYNC)
+                self.unsubscribe(subscription)
+                events_dropped.inc()
+
+    async def stream(self, subscription: Subscription):
+        """Server-Sent Events for one client, with comment heartbeats to keep proxies open."""
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if message is None:
+                    yield b"event: resync\ndata: {}\n\n"
+                    return
+                event_id, data = message
+                yield b"id: %d\ndata: %s\n\n" % (event_id, data)
+        finally:
+            self.unsubscribe(subscription)
+
+    async def watch_changes(self, db, retry_delay: float = 5):
+        """Publish events from MongoDB change streams until cancelled."""
+        watches = [
+            self._watch(db.blog_posts, [{"$match": {"$or": [
+                {"operationType": "insert"},
+                {"updateDescription.updatedFields.like_count": {"$exists": True}},
+                {"updateDescription.updatedFields.comment_count": {"$exists": True}},
+            ]}}], self._post_change, retry_delay),
+            self._watch(db.post_comments, [{"$match": {"operationType": "insert"}}],
+                        lambda change: comment_added(change["fullDocument"]), retry_delay),
+        ]
+        await asyncio.gather(*watches)
+
+    @staticmethod
+    def _post_change(change: dict):
+        if change["operationType"] == "insert":
+            return post_created(change["fullDocument"])
+        updated = change["updateDescription"]["updatedFields"]
+        counts = {k: updated[k] for k in ("like_count", "comment_count") if k in updated}
+        return post_updated(change["documentKey"]["_id"], **counts)
+
+    async def _watch(self, collection, pipeline, to_event, retry_delay):
+        resume_after = None
+        while True:
+            try:
+                async with collection.watch(pipeline, resume_after=resume_after) as stream:
+                    self.change_streams = True
+                    async for change in stream:
+                        resume_after = stream.resume_token
+                        self._fan_out(to_event(change))
+            except OperationFailure as e:
+                if e.code in (40573, 40324):  # not a replica set / stage not supported
+                    logger.warning("Change streams unavailable (%s); publishing events in-process", e)
+                    self.change_streams = False
+                    return
+                logger.exception("Change stream on %s failed; retrying", collection.name)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change stream on %s failed; retrying", collection.name)
+            await asyncio.sleep(retry_delay)
+
+
+event_bus = EventBus()
+broadcaster.subscribe("event", event_bus._fan_out)
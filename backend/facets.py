@@ -0,0 +1,75 @@
+"""Category, type and tag counts kept in the post_facets collection.
+
+Each facet is one small document ({_id: "tag:Python", kind: "tag", value: "Python", count: 12})
+bumped with $inc whenever posts are created, so reading the counts never touches blog_posts.
+rebuild_facets() recomputes everything from the posts if the counters ever drift.
+"""
+from collections import Counter
+from pymongo import DeleteMany, UpdateOne
+
+def _post_facets(post: dict) -> set:
+    facets = set()
+    if post.get("category"):
+        facets.add(("category", post["category"]))
+    if post.get("type"):
+        facets.add(("type", post["type"]))
+    for tag in post.get("tags") or []:
+        if tag:
+            facets.add(("tag", tag))
+    return facets
+
+
+def _upserts(counts: Counter, op: str) -> list:
+    return [
+        UpdateOne(
+            {"_id": f"{kind}:{value}"},
+            {op: {"count": count}, "$setOnInsert": {"kind": kind, "value": value}},
+            upsert=True,
+        )
+        for (kind, value), count in counts.items()
+    ]
+
+
+async def record_posts(db, posts: list):
+    """Count newly inserted posts into their facets with one bulk write."""
+    counts = Counter()
+    for post in posts:
+        counts.update(_post_facets(post))
+    if counts:
+        await db.post_facets.bulk_write(_upserts(counts, "$inc"), ordered=False)
+
+
+async def get_facets(db, tag_limit: int = 50) -> dict:
+    """Counts per category and type, and the tag_limit most used tags."""
+    counters = await db.post_facets.find({"kind": {"$in": ["category", "type"]}, "count": {"$gt": 0}}).to_list(length=None)
+    tags = []
+    if tag_limit > 0:
+        tags = await db.post_facets.find({"kind": "tag", "count": {"$gt": 0}}).sort("count", -1).to_list(length=tag_limit)
+    return {
+        "categories": {f["value"]: f["count"] for f in counters if f["kind"] == "category"},
+        "types": {f["value"]: f["count"] for f in counters if f["kind"] == "type"},
+        "tags": [{"tag": f["value"], "count": f["count"]} for f in tags],
+    }
+
+
+async def rebuild_facets(db) -> int:
+    """Recompute every facet count from blog_posts and drop facets that no longer exist."""
+    counts = Counter()
+    pipelines = {
+        "category": [{"$group": {"_id": "$category", "count": {"$sum": 1}}}],
+        "type": [{"$group": {"_id": "$type", "count": {"$sum": 1}}}],
+        # A tag repeated within one post counts once, as in record_posts()
+        "tag": [
+            {"$project": {"tags": {"$setUnion": [{"$ifNull": ["$tags", []]}]}}},
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+        ],
+    }
+    for kind, pipeline in pipelines.items():
+        async for row in db.blog_posts.aggregate(pipeline, allowDiskUse=True):
+            if row["_id"]:
+                counts[(kind, row["_id"])] = row["count"]
+    operations = _upserts(counts, "$set")
+    operations.append(DeleteMany({"_id": {"$nin": [f"{kind}:{value}" for kind, value in counts]}}))
+    await db.post_facets.bulk_write(operations, ordered=True)
+    return len(counts)
@@ -0,0 +1,187 @@
+"""The "hot" feed ranking: recency decay combined with likes and comments.
+
+A post's hotness is
+
+    (1 + HOT_LIKE_WEIGHT * like_count + HOT_COMMENT_WEIGHT * comment_count) * 2 ** (-age / half-life)
+
+Decaying every score as time passes would mean rewriting every post. Instead the scores
+are kept relative to a shared anchor time: each post stores
+
+    hot_weight = exp((date - hot_anchor) / tau)     (tau = half-life / ln 2)
+    hot_score  = hot_weight * (1 + likes and comments weighted as above)
+
+Multiplying by exp(-(now - anchor) / tau) would turn a stored score into the hotness, but
+that factor is the same for every post, so hot_score sorts exactly as hotness does. A like
+or comment adds its weight times hot_weight, atomically in the same update as the counter
+(activity_update). The hot feed is an indexed range scan on (hot_anchor, hot_score, _id).
+
+Scores of new posts grow with exp((now - anchor) / tau), so maintain() periodically moves
+the anchor forward (HOT_REBASE_DAYS) and rescales the stored scores by the same factor,
+newest posts first, in one worker at a time. Posts still carrying the old anchor are left out of the hot feed until
+they are rescaled, rather than outranking everything else.
+"""
+import asyncio
+import logging
+import math
+import os
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pagination import keyset_filter
+
+logger = logging.getLogger(__name__)
+
+HOT_HALF_LIFE_HOURS = float(os.getenv("HOT_HALF_LIFE_HOURS", "12"))
+HOT_LIKE_WEIGHT = float(os.getenv("HOT_LIKE_WEIGHT", "1"))
+HOT_COMMENT_WEIGHT = float(os.getenv("HOT_COMMENT_WEIGHT", "3"))
+HOT_REBASE_DAYS = float(os.getenv("HOT_REBASE_DAYS", "7"))
+HOT_REBASE_CHECK_SECONDS = float(os.getenv("HOT_REBASE_CHECK_SECONDS", "600"))
+
+TAU_MS = HOT_HALF_LIFE_HOURS * 3600 * 1000 / math.log(2)
+STATE_ID = "hot_feed"
+REBASE_BATCH_SIZE = 1000
+# How long one worker may rescale before another can take over; renewed after every batch
+RESCALE_LEASE = timedelta(minutes=5)
+
+
+# exp() overflows a float just past 709. Capped well below that so a weight times a large
+# activity still fits; a post this far past the anchor (about 14 months at the default
+# half-life, e.g. when rebasing has been failing, or a far-future date) scores as if it
+# were dated at the cap rather than making writes fail.
+MAX_WEIGHT_EXPONENT = 600
+
+
+def _weight(date: datetime, anchor: datetime) -> float:
+    exponent = (date - anchor) / timedelta(milliseconds=1) / TAU_MS
+    return math.exp(min(exponent, MAX_WEIGHT_EXPONENT))
+
+
+def _activity(like_count: int, comment_count: int) -> float:
+    return 1 + HOT_LIKE_WEIGHT * like_count + HOT_COMMENT_WEIGHT * comment_count
+
+
+async def current_anchor(db) -> datetime:
+    """The anchor new scores are computed against; set to now the first time it is asked for."""
+    state = await db.feed_state.find_one({"_id": STATE_ID})
+    if state is None:
+        state = await db.feed_state.find_one_and_update(
+            {"_id": STATE_ID}, {"$setOnInsert": {"anchor": datetime.utcnow().replace(microsecond=0)}},
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+    return state["anchor"]
+
+
+def rescale_score(score: float, old_anchor: datetime, anchor: datetime) -> float:
+    """A score computed against old_anchor, expressed against anchor."""
+    return score * _weight(old_anchor, anchor)
+
+
+def set_hot_fields(post: dict, anchor: datetime) -> dict:
+    """Add hot_anchor, hot_weight and hot_score to a post document about to be written."""
+    weight = _weight(post["date"], anchor)
+    post["hot_anchor"] = anchor
+    post["hot_weight"] = weight
+    post["hot_score"] = weight * _activity(post.get("like_count", 0), post.get("comment_count", 0))
+    return post
+
+
+def _score_delta(increase):
+    return {"$multiply": [{"$ifNull": ["$hot_weight", 0]}, increase]}
+
+
+def activity_update(like_count: int = 0, comment_count: int = 0) -> list:
+    """An update pipeline changing a post's like/comment counters and its hot_score together."""
+    fields = {}
+    for field, change in (("like_count", like_count), ("comment_count", comment_count)):
+        if change:
+            fields[field] = {"$add": [{"$ifNull": [f"${field}", 0]}, change]}
+    increase = HOT_LIKE_WEIGHT * like_count + HOT_COMMENT_WEIGHT * comment_count
+    fields["hot_score"] = {"$add": [{"$ifNull": ["$hot_score", 0]}, _score_delta(increase)]}
+    return [{"$set": fields}]
+
+
+def set_like_count_update(like_count: int) -> list:
+    """An update pipeline setting like_count to a recounted value and adjusting hot_score to match."""
+    change = {"$subtract": [like_count, {"$ifNull": ["$like_count", 0]}]}
+    return [{"$set": {
+        "like_count": like_count,
+        "hot_score": {"$add": [{"$ifNull": ["$hot_score", 0]}, _score_delta({"$multiply": [HOT_LIKE_WEIGHT, change]})]},
+    }}]
+
+
+async def _take_rescale_lease(db, owner: str) -> bool:
+    """Claim (or extend) the right to rescale for RESCALE_LEASE, so workers don't all do it at once."""
+    now = datetime.utcnow()
+    result = await db.feed_state.update_one(
+        {"_id": STATE_ID, "$or": [{"rescale_owner": owner}, {"rescale_until": {"$not": {"$gt": now}}}]},
+        {"$set": {"rescale_owner": owner, "rescale_until": now + RESCALE_LEASE}},
+    )
+    return result.matched_count == 1
+
+
+async def rescale(db, anchor: datetime) -> int:
+    """Move posts scored against an older anchor onto `anchor`, newest first. Returns the count."""
+    factor = {"$exp": {"$divide": [{"$subtract": ["$hot_anchor", anchor]}, TAU_MS]}}
+    behind = {"hot_anchor": {"$lt": anchor}}
+    # The usual case, nothing to do, is a single probe of the hot feed index
+    if not await db.blog_posts.find_one(behind, {"_id": 1}):
+        return 0
+    owner = str(ObjectId())
+    if not await _take_rescale_lease(db, owner):
+        return 0  # another worker is rescaling; whatever it leaves is picked up next time
+    rescaled, position = 0, None
+    try:
+        while True:
+            # Keyset paging on (date, _id) resumes where the last batch ended instead of
+            # scanning again past every post already rescaled
+            keyset = keyset_filter("date", -1, position)
+            posts = await db.blog_posts.find(
+                {"$and": [behind, keyset]} if keyset else behind, {"_id": 1, "date": 1}
+            ).sort([("date", -1), ("_id", -1)]).limit(REBASE_BATCH_SIZE).to_list(length=REBASE_BATCH_SIZE)
+            if not posts:
+                break
+            # Fields in one $set stage all read the document as it was, so factor uses the old anchor
+            result = await db.blog_posts.update_many(
+                {"_id": {"$in": [post["_id"] for post in posts]}, **behind},
+                [{"$set": {
+                    "hot_score": {"$multiply": ["$hot_score", factor]},
+                    "hot_weight": {"$multiply": ["$hot_weight", factor]},
+                    "hot_anchor": anchor,
+                }}],
+            )
+            rescaled += result.modified_count
+            position = [posts[-1]["date"], posts[-1]["_id"]]
+            if not await _take_rescale_lease(db, owner):
+                break  # the lease ran out and another worker took over
+    finally:
+        await db.feed_state.update_one(
+            {"_id": STATE_ID, "rescale_owner": owner}, {"$unset": {"rescale_owner": "", "rescale_until": ""}}
+        )
+    return rescaled
+
+
+async def rebase(db, now: datetime = None) -> datetime:
+    """Move the anchor to now if it is older than HOT_REBASE_DAYS, then rescale any posts behind it."""
+    now = (now or datetime.utcnow()).replace(microsecond=0)
+    anchor = await current_anchor(db)
+    if now - anchor >= timedelta(days=HOT_REBASE_DAYS):
+        # Conditional on the old anchor, so of several workers only one moves it
+        await db.feed_state.update_one({"_id": STATE_ID, "anchor": anchor}, {"$set": {"anchor": now}})
+        anchor = await current_anchor(db)
+        logger.info("Hot feed anchor moved to %s", anchor.isoformat())
+    rescaled = await rescale(db, anchor)
+    if rescaled:
+        logger.info("Rescaled hot scores of %d posts", rescaled)
+    return anchor
+
+
+async def maintain(db):
+    """Run rebase() every HOT_REBASE_CHECK_SECONDS until cancelled."""
+    while True:
+        try:
+            await rebase(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Hot feed rebase failed")
+        await asyncio.sleep(HOT_REBASE_CHECK_SECONDS)
@@ -0,0 +1,108 @@
+"""Index registry for every collection the API queries.
+
+ensure_indexes() creates the declared indexes (create_indexes is a no-op for indexes that
+already exist), and check_query_plans() runs explain() on each hot query and fails when
+one would scan the whole collection.
+
+Run from the backend directory: python indexes.py [--check]
+"""
+import asyncio
+import sys
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from search import TEXT_INDEX_WEIGHTS
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+    "blog_posts": [
+        # Feed keyset pagination sorts on (date, _id)
+        IndexModel([("date", DESCENDING), ("_id", DESCENDING)], name="date_id"),
+        IndexModel([("category", ASCENDING), ("date", DESCENDING)], name="category_date"),
+        IndexModel([("type", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="type_date_id"),
+        IndexModel(
+            [(field, TEXT) for field in TEXT_INDEX_WEIGHTS],
+            weights=TEXT_INDEX_WEIGHTS, default_language="english", name="post_text",
+        ),
+        IndexModel([("search_terms", ASCENDING), ("date", DESCENDING)], name="search_terms_date"),
+        # The hot feed reads posts scored against the current anchor by (hot_score, _id), see hot.py
+        IndexModel(
+            [("hot_anchor", ASCENDING), ("hot_score", DESCENDING), ("_id", DESCENDING)], name="hot_anchor_score_id",
+        ),
+    ],
+    "post_facets": [
+        IndexModel([("kind", ASCENDING), ("count", DESCENDING)], name="kind_count"),
+    ],
+    "post_likes": [
+        # One like per user per post; like_post relies on this to toggle atomically
+        IndexModel([("post_id", ASCENDING), ("user_id", ASCENDING)], unique=True, name="post_user_unique"),
+        # The post detail's most recent likes
+        IndexModel([("post_id", ASCENDING), ("liked_at", DESCENDING)], name="post_liked_at"),
+    ],
+    "post_comments": [
+        # Serves both top-level comment pages (parent_id null) and reply threads, oldest first
+        IndexModel(
+            [("post_id", ASCENDING), ("parent_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
+            name="post_parent_created",
+        ),
+    ],
+}
+
+# (collection, filter, sort) for the queries behind the hot endpoints
+HOT_QUERIES = [
+    ("users", {"email": "someone@example.com"}, None),
+    ("blog_posts", {"type": "job"}, [("date", -1), ("_id", -1)]),
+    ("blog_posts", {"type": {"$ne": "job"}}, [("date", -1), ("_id", -1)]),
+    ("blog_posts", {"category": "Notes"}, [("date", -1)]),
+    ("blog_posts", {"$text": {"$search": "graph theory"}}, None),
+    ("blog_posts", {"search_terms": {"$regex": "^gra"}}, [("date", -1), ("_id", -1)]),
+    ("blog_posts", {"hot_anchor": None}, [("hot_score", -1), ("_id", -1)]),
+    ("post_likes", {"post_id": None, "user_id": "someone"}, None),
+    ("post_likes", {"post_id": None}, [("liked_at", -1)]),
+    ("post_comments", {"post_id": None, "parent_id": None}, [("created_at", 1), ("_id", 1)]),
+]
+
+
+async def ensure_indexes(db):
+    """Create every index in INDEXES; existing indexes are left untouched."""
+    for collection, models in INDEXES.items():
+        await db[collection].create_indexes(models)
+
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+async def check_query_plans(db):
+    """Explain each query in HOT_QUERIES and raise RuntimeError if any winning plan is a COLLSCAN."""
+    failures = []
+    for collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in set(_stages(winning_plan)):
+            failures.append(f"{collection}.find({query}).sort({sort})")
+    if failures:
+        raise RuntimeError("Queries fall back to COLLSCAN: " + "; ".join(failures))
+
+
+async def main(check: bool):
+    from db import client, db
+    await ensure_indexes(db)
+    print("Indexes are in place.")
+    if check:
+        await check_query_plans(db)
+        print(f"All {len(HOT_QUERIES)} hot queries use an index.")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main("--check" in sys.argv[1:]))
@@ -0,0 +1,227 @@
+"""Write-behind buffering for like toggles (LIKE_WRITE_BEHIND=1).
+
+Instead of an insert/delete on post_likes and a counter update on the post for every
+toggle, toggles are kept in memory per (post, user) and written in one bulk_write per
+collection every LIKE_FLUSH_INTERVAL_MS milliseconds, or as soon as LIKE_FLUSH_MAX_OPS
+toggles are waiting. A user who toggles five times between flushes costs at most one write,
+and a post liked by hundreds of users in a burst gets one like_count and hot_score update
+per flush.
+
+Each buffered entry remembers whether the like existed before it was first toggled, so
+only real changes are written and the like_count delta is exact. Until a flush lands, the
+buffer answers for the current state: like_post returns the caller's new state and count
+immediately, and like status and post detail reads are overlaid with pending toggles.
+Pending toggles are flushed on shutdown; a crash loses at most one interval of them.
+With several workers each has its own buffer, so other workers see a toggle once it is
+flushed, when their cached feed pages for the post are dropped too.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from hot import activity_update, set_like_count_update
+from metrics import REGISTRY, Counter
+
+logger = logging.getLogger(__name__)
+
+LIKE_WRITE_BEHIND = os.getenv("LIKE_WRITE_BEHIND") == "1"
+LIKE_FLUSH_INTERVAL_MS = int(os.getenv("LIKE_FLUSH_INTERVAL_MS", "200"))
+LIKE_FLUSH_MAX_OPS = int(os.getenv("LIKE_FLUSH_MAX_OPS", "500"))
+
+like_toggles = REGISTRY.register(Counter(
+    "like_buffer_toggles_total", "Like toggles taken into the write-behind buffer."))
+like_writes = REGISTRY.register(Counter(
+    "like_buffer_writes_total", "Write operations sent to MongoDB by like buffer flushes.", ("collection",)))
+like_flushes = REGISTRY.register(Counter(
+    "like_buffer_flushes_total", "Like buffer flushes.", ("result",)))
+
+
+class PostNotFound(Exception):
+    pass
+
+
+class _Pending:
+    __slots__ = ("original", "liked", "user_name", "liked_at")
+
+    def __init__(self, original: bool, user_name: str):
+        self.original = original
+        self.liked = original
+        self.user_name = user_name
+        self.liked_at = None
+
+
+class LikeBuffer:
+    def __init__(self, db, interval_ms: int = LIKE_FLUSH_INTERVAL_MS, max_ops: int = LIKE_FLUSH_MAX_OPS,
+                 on_flush=None):
+        self.db = db
+        self.interval = interval_ms / 1000
+        self.max_ops = max_ops
+        # Called with the post ids whose like counts were just written
+        self.on_flush = on_flush
+        self._pending = {}    # (post_id, user_id) -> _Pending, toggled since the last flush
+        self._flushing = {}   # the same for the flush being written
+        self._counts = {}     # post_id -> like_count including every flushed and pending toggle
+        self._ops = 0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._kick = None
+        self._stopping = False
+
+    async def _like_exists(self, key) -> bool:
+        if key in self._flushing:
+            return self._flushing[key].liked
+        post_id, user_id = key
+        return await self.db.post_likes.find_one({"post_id": post_id, "user_id": user_id}, {"_id": 1}) is not None
+
+    async def toggle(self, post_id, user: dict):
+        """Toggle the user's like on the post; returns (liked, like_count) as they will be once flushed."""
+        key = (post_id, user["_id"])
+        while True:
+            # Reads are redone if a flush started or finished meanwhile, since it moves entries
+            generation = self._generation
+            stored = None
+            if post_id not in self._counts:
+                post = await self.db.blog_posts.find_one({"_id": post_id}, {"like_count": 1})
+                if not post:
+                    raise PostNotFound(post_id)
+                stored = post.get("like_count", 0)
+            original = None if key in self._pending else await self._like_exists(key)
+            if generation == self._generation:
+                break
+        # Nothing below awaits, so the toggle lands wholly in one flush
+        if stored is not None:
+            self._counts.setdefault(post_id, stored)
+        if original is not None:
+            # Another toggle by the same user may have got here first while we awaited
+            self._pending.setdefault(key, _Pending(original, user.get("name", "")))
+        entry = self._pending[key]
+        entry.liked = not entry.liked
+        if entry.liked:
+            entry.liked_at = datetime.utcnow()
+        self._counts[post_id] += 1 if entry.liked else -1
+        like_toggles.inc()
+        self._ops += 1
+        if self._ops >= self.max_ops and self._kick is not None:
+            self._kick.set()
+        return entry.liked, self._counts[post_id]
+
+    def liked(self, post_id, user_id):
+        """The user's buffered like state for a post, or None if nothing is buffered."""
+        entry = self._pending.get((post_id, user_id)) or self._flushing.get((post_id, user_id))
+        return None if entry is None else entry.liked
+
+    def like_count(self, post_id, stored: int) -> int:
+        """A post's like_count with buffered toggles applied."""
+        return self._counts.get(post_id, stored)
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending, self._ops = self._pending, {}, 0
+            self._flushing = batch
+            self._generation += 1
+            try:
+                await self._write(batch)
+                like_flushes.inc("ok")
+            except asyncio.CancelledError:
+                # The batch is no longer in _pending; put it back so the next flush writes it
+                self._restore(batch)
+                raise
+            except Exception:
+                like_flushes.inc("error")
+                logger.exception("Like buffer flush failed; keeping %d toggles for the next one", len(batch))
+                self._restore(batch)
+                return
+            finally:
+                self._flushing = {}
+                self._generation += 1
+            flushed = {post_id for post_id, _ in batch}
+            # Posts with nothing left in the buffer read their count from MongoDB again
+            for post_id in flushed - {post_id for post_id, _ in self._pending}:
+                self._counts.pop(post_id, None)
+            if self.on_flush is not None:
+                self.on_flush(flushed)
+
+    def _restore(self, batch: dict):
+        for key, entry in batch.items():
+            newer = self._pending.get(key)
+            if newer is None:
+                self._pending[key] = entry
+            else:
+                # Toggled again during the flush: the newer entry assumed this write landed
+                newer.original = entry.original
+        self._ops += len(batch)
+
+    async def _write(self, batch: dict):
+        like_ops, op_posts, deltas, deletes = [], [], {}, set()
+        for (post_id, user_id), entry in batch.items():
+            if entry.liked == entry.original:
+                continue
+            op_posts.append(post_id)
+            if entry.liked:
+                like_ops.append(InsertOne({
+                    "post_id": post_id, "user_id": user_id,
+                    "user_name": entry.user_name, "liked_at": entry.liked_at,
+                }))
+            else:
+                like_ops.append(DeleteOne({"post_id": post_id, "user_id": user_id}))
+                deletes.add(post_id)
+            deltas[post_id] = deltas.get(post_id, 0) + (1 if entry.liked else -1)
+        if not like_ops:
+            return
+        recount = set()
+        try:
+            result = await self.db.post_likes.bulk_write(like_ops, ordered=False)
+            if result.deleted_count < sum(isinstance(op, DeleteOne) for op in like_ops):
+                recount |= deletes
+        except BulkWriteError as e:
+            # The like was added or removed elsewhere meanwhile; count those posts from scratch
+            recount = {op_posts[error["index"]] for error in e.details["writeErrors"]} | deletes
+        like_writes.inc("post_likes", amount=len(like_ops))
+        post_ops = [
+            UpdateOne({"_id": post_id}, activity_update(like_count=delta))
+            for post_id, delta in deltas.items() if delta and post_id not in recount
+        ]
+        if recount:
+            counts = {
+                row["_id"]: row["count"]
+                async for row in self.db.post_likes.aggregate([
+                    {"$match": {"post_id": {"$in": list(recount)}}},
+                    {"$group": {"_id": "$post_id", "count": {"$sum": 1}}},
+                ])
+            }
+            post_ops.extend(UpdateOne({"_id": p}, set_like_count_update(counts.get(p, 0))) for p in recount)
+        if post_ops:
+            await self.db.blog_posts.bulk_write(post_ops, ordered=False)
+            like_writes.inc("blog_posts", amount=len(post_ops))
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._kick.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._kick.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Like buffer flush failed")
+
+    def start(self):
+        self._stopping = False
+        self._kick = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic flusher and write whatever is still buffered."""
+        if self._task is not None:
+            # Not cancelled: a flush under way is let finish rather than interrupted mid-write
+            self._stopping = True
+            self._kick.set()
+            await self._task
+            self._task = None
+        await self.flush()
@@ -1,29 +1,65 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 import os
 from routes import auth, blog, papers
 from fastapi.staticfiles import StaticFiles
+import db as database
 from db import db
-
-# Optional: Cloudinary support (remove if not needed)
-try:
-    import cloudinary
-    import cloudinary.api
-    import cloudinary.uploader
-except ImportError:
-    cloudinary = None
+from cloudinary_sdk import cloudinary_installed
+from indexes import ensure_indexes, check_query_plans
+from contextlib import asynccontextmanager
+import passwords
+import asyncio
+from paper_urls import paper_urls
+from events import event_bus
+from broadcast import broadcaster
+import metrics
+import admission
+import hot
 
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
-if cloudinary is not None:
-    cloudinary.config(
-        cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-        api_key=os.getenv('CLOUDINARY_API_KEY'),
-        api_secret=os.getenv('CLOUDINARY_API_SECRET')
-    )
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await database.warm_up()
+    await ensure_indexes(db)
+    # Set INDEX_CHECK=1 to refuse to start when a hot query would scan a whole collection
+    if os.getenv("INDEX_CHECK") == "1":
+        await check_query_plans(db)
+    # Set PAPERS_PREFETCH=1 to warm the paper URL cache in the background
+    prefetch = None
+    if os.getenv("PAPERS_PREFETCH") == "1" and cloudinary_installed():
+        prefetch = asyncio.create_task(paper_urls.prefetch())
+    # Set EVENTS_CHANGE_STREAMS=1 on a replica set to push writes made by any process
+    watcher = None
+    if os.getenv("EVENTS_CHANGE_STREAMS") == "1":
+        watcher = asyncio.create_task(event_bus.watch_changes(db))
+    # Set by serve.py when running several workers, so their caches stay coherent
+    channel = None
+    if broadcaster.enabled:
+        await broadcaster.open(db)
+        channel = asyncio.create_task(broadcaster.run())
+    # Moves the hot feed's score anchor forward now and then (see hot.py)
+    rebase = asyncio.create_task(hot.maintain(db))
+    # Set LIKE_WRITE_BEHIND=1 to batch like toggles; whatever is buffered is written on shutdown
+    if blog.like_buffer is not None:
+        blog.like_buffer.start()
+    yield
+    tasks = [task for task in (prefetch, watcher, channel, rebase) if task is not None and not task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if blog.like_buffer is not None:
+        await blog.like_buffer.stop()
+    await broadcaster.stop()
+    database.close()
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+# Added before CORS so shed requests still get CORS headers and browsers can read the 503/429
+app.add_middleware(admission.AdmissionMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,8 +72,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Outermost, so CORS and everything below is included in the timings
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(auth.router)
 app.include_router(blog.router)
 app.include_router(papers.router)
@@ -52,7 +92,36 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "message": "Student Collaboration Hub API is running"}
+    return {
+        "status": "ok",
+        "message": "Student Collaboration Hub API is running",
+        "password_hashing": passwords.stats(),
+    }
+
+def password_pool_metrics():
+    stats = passwords.stats()
+    gauges = {
+        "password_hash_concurrency": ("Threads available for bcrypt.", stats["concurrency"]),
+        "password_hash_queued": ("Password hashes waiting for a thread.", stats["queued"]),
+        "password_hash_running": ("Password hashes in progress.", stats["running"]),
+        "password_hash_wait_seconds_max": ("Longest wait for a bcrypt thread.", stats["wait_seconds_max"]),
+    }
+    counters = {
+        "password_hash_completed_total": ("Password hashes and verifications completed.", stats["completed"]),
+        "password_hash_wait_seconds_total": ("Time spent waiting for a bcrypt thread.", stats["wait_seconds_total"]),
+        "password_hash_run_seconds_total": ("Time spent hashing.", stats["run_seconds_total"]),
+    }
+    for kind, metrics_by_name in ((metrics.Gauge, gauges), (metrics.Counter, counters)):
+        for name, (documentation, value) in metrics_by_name.items():
+            metric = kind(name, documentation)
+            metric.inc(amount=value)
+            yield metric
+
+metrics.REGISTRY.add_collector(password_pool_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/papers")
 async def get_papers():
@@ -0,0 +1,237 @@
+"""Prometheus-style metrics without a client library.
+
+MetricsMiddleware records request counts, in-flight requests and latency per route
+template. Event streams (text/event-stream responses) are counted but left out of the
+in-flight gauge and the latency histogram once they start: they stay open for as long as
+the client is connected, which is tracked by the events_subscribers gauge instead. CommandMetrics is a pymongo command listener (attached to the client in db.py)
+that records latency per collection and command. REGISTRY.render() produces the Prometheus
+text exposition format served at /metrics.
+
+pymongo calls listeners from motor's worker threads, so every metric is guarded by a lock.
+"""
+import threading
+import time
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        lines = self._header()
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *label_values, value: float):
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                series = self._values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            values = {labels: list(series) for labels, series in self._values.items()}
+        lines = self._header()
+        for label_values, series in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {series[-1]}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """Register a function called on every scrape that returns metrics to render."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for metric in collect():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests handled.", ("method", "route", "status")))
+http_in_progress = REGISTRY.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled.", ("method",)))
+http_duration = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request, until the response is sent.",
+    ("method", "route")))
+mongo_duration = REGISTRY.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency as reported by the driver.",
+    ("collection", "command")))
+mongo_failures = REGISTRY.register(Counter(
+    "mongodb_command_failures_total", "MongoDB commands that failed.", ("collection", "command")))
+
+
+def _route_template(scope, root_path: str) -> str:
+    """The path template of the route that handled the request (set by the router)."""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path_format", None) or route.path
+    # Mounted apps (e.g. /static) extend root_path instead of setting a route
+    if len(scope.get("root_path", "")) > len(root_path):
+        return scope["root_path"][len(root_path):]
+    return UNMATCHED_ROUTE
+
+
+def _is_event_stream(message) -> bool:
+    return any(
+        name.lower() == b"content-type" and value.startswith(b"text/event-stream")
+        for name, value in message.get("headers", ())
+    )
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed until their last chunk.
+
+    The route template is only known once the router has matched the request, so requests
+    in flight are counted per method.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        status = {"code": 500, "stream": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if _is_event_stream(message):
+                    status["stream"] = True
+                    http_in_progress.dec(method)
+            await send(message)
+
+        http_in_progress.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = _route_template(scope, root_path)
+            if not status["stream"]:
+                http_duration.observe(method, route, value=time.perf_counter() - started)
+                http_in_progress.dec(method)
+            http_requests.inc(method, route, str(status["code"]))
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Records the latency of every MongoDB command per collection and command name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name) if event.command else None
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+        mongo_duration.observe(collection, event.command_name, value=event.duration_micros / 1e6)
+        return collection
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        mongo_failures.inc(self._finish(event), event.command_name)
@@ -0,0 +1,15 @@
+"""Data migrations, applied in order by `python -m migrations` from the backend directory."""
+from migrations.runner import Migration, BatchMigration, run_migrations, migration_status
+from migrations.m0001_blog_images import BlogImages
+from migrations.m0002_post_likes import PostLikes
+from migrations.m0003_post_comments import PostComments
+from migrations.m0004_search_terms import SearchTerms
+from migrations.m0005_hot_scores import HotScores
+
+MIGRATIONS = [
+    BlogImages(),
+    PostLikes(),
+    PostComments(),
+    SearchTerms(),
+    HotScores(),
+]
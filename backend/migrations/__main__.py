@@ -0,0 +1,37 @@
+"""Apply pending data migrations.
+
+Run from the backend directory:
+    python -m migrations             apply everything not yet applied (resuming interrupted ones)
+    python -m migrations --list      show each migration's status
+    python -m migrations --rerun 0004_search_terms
+"""
+import argparse
+import asyncio
+from db import client, db
+from indexes import ensure_indexes
+from migrations import MIGRATIONS, migration_status, run_migrations
+
+
+async def main(args):
+    if args.list:
+        for migration, record in await migration_status(db, MIGRATIONS):
+            status = record.get("status", "pending") if record else "pending"
+            print(f"{migration.name:<24} {status:<8} {migration.description}")
+        return
+    await ensure_indexes(db)
+    ran = await run_migrations(db, MIGRATIONS, rerun=tuple(args.rerun))
+    print(f"{ran} migration(s) applied." if ran else "Nothing to migrate.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending data migrations.")
+    parser.add_argument("--list", action="store_true", help="show migration status and exit")
+    parser.add_argument("--rerun", nargs="*", default=[], metavar="NAME",
+                        help="run these migrations again from the start")
+    args = parser.parse_args()
+    unknown = set(args.rerun) - {m.name for m in MIGRATIONS}
+    if unknown:
+        parser.error(f"unknown migration(s): {', '.join(sorted(unknown))}")
+    try:
+        asyncio.run(main(args))
+    finally:
+        client.close()
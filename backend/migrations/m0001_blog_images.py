@@ -0,0 +1,26 @@
+from migrations.runner import MIGRATIONS_COLLECTION, Migration
+
+# Category to image mapping
+CATEGORY_IMAGES = {
+    "AI-ML": "/static/blog_images/ai-ml.jpg",
+    "Programming": "/static/blog_images/programming.jpg",
+    "Telecommunications": "/static/blog_images/telecom.jpg",
+    "Study Tips": "/static/blog_images/study-tips.jpg",
+    "Career": "/static/blog_images/career.jpg",
+}
+
+
+class BlogImages(Migration):
+    name = "0001_blog_images"
+    description = "set imageUrl on blog posts from their category"
+
+    async def run(self, db, record: dict):
+        # A filter covers the whole mapping, so one update_many per category is enough
+        processed = 0
+        for category, image_url in CATEGORY_IMAGES.items():
+            result = await db.blog_posts.update_many(
+                {"category": category, "imageUrl": {"$ne": image_url}},
+                {"$set": {"imageUrl": image_url}}
+            )
+            processed += result.modified_count
+        await db[MIGRATIONS_COLLECTION].update_one({"_id": self.name}, {"$set": {"processed": processed}})
@@ -0,0 +1,49 @@
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from migrations.runner import BatchMigration
+
+
+class PostLikes(BatchMigration):
+    name = "0002_post_likes"
+    description = "move embedded blog_posts.likes into the post_likes collection"
+    collection = "blog_posts"
+    filter = {"likes": {"$exists": True}}
+    projection = {"likes": 1}
+
+    async def apply_batch(self, db, docs: list):
+        inserts = []
+        for post in docs:
+            likes = {like["user_id"]: like for like in post.get("likes", []) if like.get("user_id")}
+            inserts.extend(
+                InsertOne({
+                    "post_id": post["_id"],
+                    "user_id": like["user_id"],
+                    "user_name": like.get("user_name"),
+                    "liked_at": like.get("liked_at"),
+                })
+                for like in likes.values()
+            )
+        if inserts:
+            try:
+                await db.post_likes.bulk_write(inserts, ordered=False)
+            except BulkWriteError as e:
+                # Likes copied before an interrupted run already exist (duplicate key); any
+                # other failure must stop the run before the embedded likes are unset below
+                duplicates_only = all(error["code"] == 11000 for error in e.details["writeErrors"])
+                if not duplicates_only or e.details.get("writeConcernErrors"):
+                    raise
+        post_ids = [post["_id"] for post in docs]
+        counts = {
+            row["_id"]: row["count"]
+            async for row in db.post_likes.aggregate([
+                {"$match": {"post_id": {"$in": post_ids}}},
+                {"$group": {"_id": "$post_id", "count": {"$sum": 1}}},
+            ])
+        }
+        await db.blog_posts.bulk_write([
+            UpdateOne(
+                {"_id": post_id},
+                {"$set": {"like_count": counts.get(post_id, 0)}, "$unset": {"likes": ""}}
+            )
+            for post_id in post_ids
+        ], ordered=False)
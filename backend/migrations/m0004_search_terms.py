@@ -0,0 +1,17 @@
+from pymongo import UpdateOne
+from migrations.runner import BatchMigration
+from search import search_terms
+
+
+class SearchTerms(BatchMigration):
+    name = "0004_search_terms"
+    description = "fill in blog_posts.search_terms for prefix search"
+    collection = "blog_posts"
+    filter = {"search_terms": {"$exists": False}}
+    projection = {"title": 1, "tags": 1}
+
+    async def apply_batch(self, db, docs: list):
+        await db.blog_posts.bulk_write([
+            UpdateOne({"_id": post["_id"]}, {"$set": {"search_terms": search_terms(post)}})
+            for post in docs
+        ], ordered=False)
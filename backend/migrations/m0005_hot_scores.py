@@ -0,0 +1,25 @@
+from datetime import datetime
+from pymongo import UpdateOne
+from migrations.runner import BatchMigration
+from hot import current_anchor, set_hot_fields
+
+
+class HotScores(BatchMigration):
+    name = "0005_hot_scores"
+    description = "fill in blog_posts.hot_anchor, hot_weight and hot_score for the hot feed"
+    collection = "blog_posts"
+    filter = {"hot_anchor": {"$exists": False}}
+    projection = {"date": 1, "like_count": 1, "comment_count": 1}
+
+    async def apply_batch(self, db, docs: list):
+        anchor = await current_anchor(db)
+        updates = []
+        for post in docs:
+            if not isinstance(post.get("date"), datetime):
+                # Fall back to the creation time recorded in the _id
+                post["date"] = post["_id"].generation_time.replace(tzinfo=None)
+            fields = set_hot_fields(post, anchor)
+            updates.append(UpdateOne({"_id": post["_id"]}, {"$set": {
+                key: fields[key] for key in ("hot_anchor", "hot_weight", "hot_score")
+            }}))
+        await db.blog_posts.bulk_write(updates, ordered=False)
@@ -0,0 +1,87 @@
+"""Resumable data migrations.
+
+Every migration has a record in the `migrations` collection:
+    {_id: name, status: "running" | "applied", checkpoint, processed, started_at, applied_at}
+
+A BatchMigration streams its collection in `_id` order, hands each batch to
+apply_batch() (which should issue one bulk_write or update_many, not a write per
+document) and saves the last `_id` of the batch as its checkpoint. If the process dies,
+the next run resumes after the checkpoint, so apply_batch() only has to be safe to repeat
+for the one batch that was in flight.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pymongo import ReturnDocument
+
+MIGRATIONS_COLLECTION = "migrations"
+
+
+class Migration(ABC):
+    name = ""
+    description = ""
+
+    @abstractmethod
+    async def run(self, db, record: dict):
+        ...
+
+
+class BatchMigration(Migration):
+    collection = ""
+    filter = {}
+    projection = None
+    batch_size = 500
+
+    @abstractmethod
+    async def apply_batch(self, db, docs: list):
+        ...
+
+    async def run(self, db, record: dict):
+        checkpoint = record.get("checkpoint")
+        while True:
+            query = dict(self.filter)
+            if checkpoint is not None:
+                query["_id"] = {"$gt": checkpoint}
+            docs = await db[self.collection].find(query, self.projection) \
+                .sort("_id", 1).limit(self.batch_size).to_list(length=self.batch_size)
+            if not docs:
+                return
+            await self.apply_batch(db, docs)
+            checkpoint = docs[-1]["_id"]
+            await db[MIGRATIONS_COLLECTION].update_one(
+                {"_id": self.name},
+                {"$set": {"checkpoint": checkpoint}, "$inc": {"processed": len(docs)}}
+            )
+
+
+async def migration_status(db, migrations: list) -> list:
+    records = {r["_id"]: r async for r in db[MIGRATIONS_COLLECTION].find()}
+    return [(m, records.get(m.name)) for m in migrations]
+
+
+async def run_migrations(db, migrations: list, rerun: tuple = (), log=print) -> int:
+    """Apply every migration that has not been applied yet, in order; returns how many ran.
+
+    Names in `rerun` are started again from scratch even if they were applied.
+    """
+    ran = 0
+    for migration, record in await migration_status(db, migrations):
+        if migration.name in rerun:
+            record = None
+        elif record and record.get("status") == "applied":
+            continue
+        if record is None:
+            record = {"_id": migration.name, "status": "running", "checkpoint": None,
+                      "processed": 0, "started_at": datetime.utcnow()}
+            await db[MIGRATIONS_COLLECTION].replace_one({"_id": migration.name}, record, upsert=True)
+        else:
+            log(f"Resuming {migration.name} after {record.get('checkpoint')}")
+        log(f"Applying {migration.name}: {migration.description}")
+        await migration.run(db, record)
+        record = await db[MIGRATIONS_COLLECTION].find_one_and_update(
+            {"_id": migration.name},
+            {"$set": {"status": "applied", "applied_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        log(f"Applied {migration.name} ({record.get('processed', 0)} documents)")
+        ran += 1
+    return ran
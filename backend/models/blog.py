@@ -12,8 +12,24 @@ class Comment(BaseModel):
     user_id: str
     user_name: str
     text: str
+    parent_id: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class CommentCreate(BaseModel):
+    text: str
+    parent_id: Optional[str] = None
+
+class CommentResponse(BaseModel):
+    id: str
+    post_id: str
+    parent_id: Optional[str] = None
+    user_id: str
+    user_name: str
+    text: str
+    created_at: datetime
+    reply_count: int = 0
+    replies: List["CommentResponse"] = []
+
 class BlogPostCreate(BaseModel):
     type: Optional[str] = None
     title: str
@@ -42,8 +58,27 @@ class BlogPostResponse(BaseModel):
     tags: Optional[List[str]] = []
     likes: List[LikeInfo]
     like_count: int
+    comment_count: int = 0
     content: Optional[str] = None
-    comments: Optional[List[Comment]] = []
+    document_url: Optional[str] = None
+    job_link: Optional[str] = None
+    referral_info: Optional[str] = None
+
+class BlogPostSummary(BaseModel):
+    """Card fields for feed listings; the full post is served by GET /posts/{post_id}."""
+    id: str
+    type: Optional[str] = None
+    title: str
+    excerpt: str
+    author: str
+    date: datetime
+    category: str
+    read_time: str
+    image: Optional[str] = None
+    tags: Optional[List[str]] = []
+    like_count: int
+    comment_count: int
+    content_preview: Optional[str] = None
     document_url: Optional[str] = None
     job_link: Optional[str] = None
     referral_info: Optional[str] = None
@@ -0,0 +1,85 @@
+import base64
+from datetime import datetime
+from bson import ObjectId, json_util
+
+
+def encode_cursor(state: dict) -> str:
+    """Encode pagination state as an opaque, URL-safe cursor string."""
+    raw = json_util.dumps(state).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict):
+        raise ValueError("Invalid cursor")
+    return state
+
+
+def _is_sort_value(value) -> bool:
+    return isinstance(value, datetime) or (isinstance(value, (int, float)) and not isinstance(value, bool))
+
+
+def keyset_filter(field: str, direction: int, after) -> dict:
+    """Filter matching documents strictly after the (value, _id) position for a (field, _id) sort."""
+    if not after:
+        return {}
+    if not isinstance(after, (list, tuple)) or len(after) != 2:
+        raise ValueError("Invalid cursor position")
+    value, last_id = after
+    # Positions come from client-supplied cursors; anything but a sort value and an _id could
+    # smuggle operator documents or mismatched types into the filter
+    if not _is_sort_value(value) or not isinstance(last_id, ObjectId):
+        raise ValueError("Invalid cursor position")
+    op = "$lt" if direction < 0 else "$gt"
+    return {"$or": [{field: {op: value}}, {field: value, "_id": {op: last_id}}]}
+
+
+class KeysetStream:
+    """A lazily advanced cursor over `query` sorted by (field, _id), resuming after a keyset position.
+
+    Documents are pulled from MongoDB in small batches only as they are consumed, so reading
+    a page never loads more than the page (plus one look-ahead document) per stream.
+    """
+
+    def __init__(self, collection, query: dict, field: str, direction: int = -1,
+                 after=None, limit: int = 20, projection: dict = None):
+        self.field = field
+        self.direction = direction
+        self.position = after
+        keyset = keyset_filter(field, direction, after)
+        full_query = {"$and": [query, keyset]} if keyset else query
+        self._cursor = (
+            collection.find(full_query, projection)
+            .sort([(field, direction), ("_id", direction)])
+            .limit(limit + 1)
+            .batch_size(limit // 2 + 2)
+        )
+        self._buffered = None
+        self._exhausted = False
+
+    async def peek(self):
+        """Return the next document without consuming it, or None when the stream is exhausted."""
+        if self._buffered is None and not self._exhausted:
+            try:
+                self._buffered = await self._cursor.next()
+            except StopAsyncIteration:
+                self._exhausted = True
+        return self._buffered
+
+    async def next(self):
+        """Consume and return the next document, or None when the stream is exhausted."""
+        doc = await self.peek()
+        if doc is not None:
+            self._buffered = None
+            self.position = [doc[self.field], doc["_id"]]
+        return doc
+
+    async def close(self):
+        if not self._exhausted:
+            await self._cursor.close()
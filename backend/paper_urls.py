@@ -0,0 +1,82 @@
+"""Cached, coalesced resolution of question paper filenames to Cloudinary URLs.
+
+A paper's URL almost never changes, but looking it up is a synchronous Cloudinary API call.
+PaperUrlResolver keeps resolved URLs for PAPER_URL_TTL seconds and remembers missing files
+for PAPER_URL_NEGATIVE_TTL seconds. Concurrent misses for the same filename share a single
+lookup, which runs on a worker thread.
+"""
+import asyncio
+import logging
+import os
+from starlette.concurrency import run_in_threadpool
+from cache import TTLCache
+from cloudinary_sdk import get_cloudinary
+
+logger = logging.getLogger(__name__)
+
+PAPERS_PREFIX = "student_hub/papers/"
+_MISSING = object()
+
+
+class PaperUrlResolver:
+    def __init__(self, prefix: str = PAPERS_PREFIX, ttl: float = 3600, negative_ttl: float = 60,
+                 maxsize: int = 2048):
+        self.prefix = prefix
+        self.negative_ttl = negative_ttl
+        self._cache = TTLCache(maxsize, ttl)
+        self._inflight = {}
+
+    async def resolve(self, filename: str):
+        """Return the secure URL for a paper, or None if Cloudinary has no such file."""
+        url = self._cache.get(filename, _MISSING)
+        if url is not _MISSING:
+            return url
+        lookup = self._inflight.get(filename)
+        if lookup is None:
+            lookup = asyncio.ensure_future(self._lookup(filename))
+            self._inflight[filename] = lookup
+            lookup.add_done_callback(lambda _: self._inflight.pop(filename, None))
+        # Shielded so one cancelled request doesn't cancel the lookup other requests wait on
+        return await asyncio.shield(lookup)
+
+    async def _lookup(self, filename: str):
+        cloudinary = get_cloudinary()
+        try:
+            resource = await run_in_threadpool(cloudinary.api.resource, self.prefix + filename)
+        except cloudinary.exceptions.NotFound:
+            self._cache.set(filename, None, ttl=self.negative_ttl)
+            return None
+        url = resource.get('secure_url')
+        self._cache.set(filename, url, ttl=None if url else self.negative_ttl)
+        return url
+
+    async def prefetch(self):
+        """Load the URL of every file under the papers folder into the cache."""
+        next_cursor = None
+        loaded = 0
+        cloudinary = get_cloudinary()
+        try:
+            while True:
+                kwargs = {"type": "upload", "prefix": self.prefix, "max_results": 500}
+                if next_cursor:
+                    kwargs["next_cursor"] = next_cursor
+                page = await run_in_threadpool(cloudinary.api.resources, **kwargs)
+                for resource in page.get("resources", []):
+                    url = resource.get("secure_url")
+                    if url:
+                        self._cache.set(resource["public_id"][len(self.prefix):], url)
+                        loaded += 1
+                next_cursor = page.get("next_cursor")
+                if not next_cursor:
+                    break
+        except Exception:
+            logger.exception("Paper URL prefetch stopped after %d URLs", loaded)
+            return loaded
+        logger.info("Prefetched %d paper URLs", loaded)
+        return loaded
+
+
+paper_urls = PaperUrlResolver(
+    ttl=float(os.getenv("PAPER_URL_TTL", "3600")),
+    negative_ttl=float(os.getenv("PAPER_URL_NEGATIVE_TTL", "60")),
+)
@@ -0,0 +1,71 @@
+"""bcrypt hashing off the event loop.
+
+bcrypt deliberately burns 100-300 ms of CPU per call. Running it inside an async handler
+stalls every other request in the process, so hashing and verification run in a small
+thread pool instead (the bcrypt extension releases the GIL while it works). The pool size
+caps how many cores password work can take; requests beyond it wait in a queue whose depth
+and wait times are reported by stats().
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "2"))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="bcrypt")
+
+_lock = threading.Lock()
+_stats = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+    "run_seconds_total": 0.0,
+}
+
+
+def _timed(func, enqueued_at, *args):
+    started_at = time.perf_counter()
+    wait = started_at - enqueued_at
+    with _lock:
+        _stats["queued"] -= 1
+        _stats["running"] += 1
+        _stats["wait_seconds_total"] += wait
+        _stats["wait_seconds_max"] = max(_stats["wait_seconds_max"], wait)
+    try:
+        return func(*args)
+    finally:
+        with _lock:
+            _stats["running"] -= 1
+            _stats["completed"] += 1
+            _stats["run_seconds_total"] += time.perf_counter() - started_at
+
+
+async def _run(func, *args):
+    with _lock:
+        _stats["queued"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _timed, func, time.perf_counter(), *args)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await _run(pwd_context.verify, password, hashed)
+
+
+def stats() -> dict:
+    """Snapshot of the password pool: current queue depth, in-flight work and wait times."""
+    with _lock:
+        snapshot = dict(_stats)
+    completed = snapshot["completed"]
+    snapshot["wait_seconds_avg"] = snapshot["wait_seconds_total"] / completed if completed else 0.0
+    return {"concurrency": PASSWORD_HASH_CONCURRENCY, **snapshot}
@@ -1,23 +1,32 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Body, Request, UploadFile, File
-from passlib.context import CryptContext
 from models.user import UserCreate
+from passwords import hash_password, verify_password
 from db import db
+import asyncio
 import jwt
 import datetime
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from dependencies import SECRET_KEY, ALGORITHM, get_current_user, invalidate_user, user_cache
 from bson import ObjectId
+from pymongo import ReturnDocument
 import os
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from gridfs.errors import NoFile
+from cache import etag_matches
 from motor.motor_asyncio import AsyncIOMotorGridFSBucket
 from fastapi.middleware.cors import CORSMiddleware
+from typing import List
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-SECRET_KEY = os.getenv("JWT_SECRET", "your_secret_key")  # Replace with a secure key in production
-ALGORITHM = "HS256"
+# Profile photos are stored in GridFS and streamed in GridFS-sized chunks
+PROFILE_PHOTO_MAX_BYTES = int(os.getenv("PROFILE_PHOTO_MAX_BYTES", str(5 * 1024 * 1024)))
+PHOTO_CHUNK_SIZE = 255 * 1024
+PHOTO_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
-security = HTTPBearer()
+# Profile fields other users may see (e.g. next to the posts they wrote); never the password
+# or contact details
+PUBLIC_USER_FIELDS = ("name", "department", "year", "skills", "hobbies", "photo", "profilePicture")
+USERS_BATCH_MAX = int(os.getenv("USERS_BATCH_MAX", "100"))
 
 PROFILE_PHOTO_DIR = os.path.join(os.path.dirname(__file__), '..', 'static', 'profile_photos')
 os.makedirs(PROFILE_PHOTO_DIR, exist_ok=True)
@@ -27,7 +36,7 @@ async def register(user: UserCreate):
     existing = await db.users.find_one({"email": user.email})
     if existing:
         raise HTTPException(status_code=400, detail="Email already exists")
-    hashed_pw = pwd_context.hash(user.password)
+    hashed_pw = await hash_password(user.password)
     user_dict = user.dict()
     user_dict["password"] = hashed_pw
     # Convert dateOfBirth to string if present
@@ -41,7 +50,7 @@ async def login(email: str = Body(...), password: str = Body(...)):
     user = await db.users.find_one({"email": email})
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
-    if not pwd_context.verify(password, user["password"]):
+    if not await verify_password(password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     payload = {
         "sub": str(user["_id"]),
@@ -59,74 +68,203 @@ async def login(email: str = Body(...), password: str = Body(...)):
     }
 
 @router.get("/me")
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+async def get_me(user: dict = Depends(get_current_user)):
+    return {"user": user}
+
+def _public_profile(user: dict) -> dict:
+    profile = {field: user[field] for field in PUBLIC_USER_FIELDS if field in user}
+    profile["_id"] = str(user["_id"])
+    return profile
+
+@router.post("/users/batch")
+async def get_users_batch(user_ids: List[str] = Body(..., embed=True), user: dict = Depends(get_current_user)):
+    """Public profiles (PUBLIC_USER_FIELDS) of several users, e.g. the authors on a feed page.
+
+    Results follow the order of user_ids; an id that is malformed or has no user gets
+    {"_id": ..., "error": "not_found"} in its place. Users in the auth cache are served
+    from it and the rest are fetched with one query.
+    """
+    if len(user_ids) > USERS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {USERS_BATCH_MAX} user ids are allowed")
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        # Remove sensitive fields
-        user.pop("password", None)
-        user["_id"] = str(user["_id"])
-        return {"user": user}
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
+        # Canonical (lowercase) id strings, as the cache and str(ObjectId) use them
+        keys = {uid: str(ObjectId(uid)) for uid in user_ids if ObjectId.is_valid(uid)}
+        profiles = {}
+        missing = set()
+        for key in set(keys.values()):
+            cached = user_cache.get(key)
+            if cached is not None:
+                profiles[key] = _public_profile(cached)
+            else:
+                missing.add(ObjectId(key))
+        if missing:
+            projection = {field: 1 for field in PUBLIC_USER_FIELDS}
+            async for found in db.users.find({"_id": {"$in": list(missing)}}, projection):
+                profiles[str(found["_id"])] = _public_profile(found)
+        return {"users": [
+            profiles.get(keys.get(uid)) or {"_id": uid, "error": "not_found"} for uid in user_ids
+        ]}
     except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
 
 @router.post("/upload-photo")
 async def upload_profile_photo(
+    request: Request,
     file: UploadFile = File(...),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
-    token = credentials.credentials
+    if file.size is not None and file.size > PROFILE_PHOTO_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Photo is too large")
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        # Store file in GridFS
+        # Stream the upload into GridFS chunk by chunk instead of reading it whole
         fs = AsyncIOMotorGridFSBucket(db)
-        file_id = await fs.upload_from_stream(file.filename or 'profile.jpg', await file.read())
+        grid_in = fs.open_upload_stream(
+            file.filename or 'profile.jpg',
+            metadata={"contentType": file.content_type, "user_id": user["_id"]}
+        )
+        size = 0
+        try:
+            while chunk := await file.read(PHOTO_CHUNK_SIZE):
+                size += len(chunk)
+                if size > PROFILE_PHOTO_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Photo is too large")
+                await grid_in.write(chunk)
+            await grid_in.close()
+        except BaseException:
+            # Whatever stopped the copy (too large, a failed write, the client going away),
+            # delete the chunks written so far instead of leaving them orphaned
+            await asyncio.shield(grid_in.abort())
+            raise
+        file_id = str(grid_in._id)
         # Update user document with GridFS file id
-        await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": {"photo": str(file_id)}})
-        return {"photo_id": str(file_id)}
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
+        await db.users.update_one({"_id": ObjectId(user["_id"])}, {"$set": {"photo": file_id}})
+        invalidate_user(user["_id"])
+        return {
+            "photo_id": file_id,
+            "photo_url": str(request.url_for("get_profile_photo", file_id=file_id)),
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"Photo upload failed: {str(e)}"})
 
+@router.get("/photo/{file_id}", name="get_profile_photo")
+async def get_profile_photo(file_id: str, request: Request):
+    """Stream a profile photo from GridFS, honouring single-range requests.
+
+    GridFS files are never modified (a new upload gets a new id), so the file id is a strong
+    ETag and clients may cache the photo indefinitely.
+    """
+    if not ObjectId.is_valid(file_id):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    etag = f'"{file_id}"'
+    cache_headers = {"ETag": etag, "Cache-Control": PHOTO_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+    fs = AsyncIOMotorGridFSBucket(db)
+    try:
+        grid_out = await fs.open_download_stream(ObjectId(file_id))
+    except NoFile:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    length = grid_out.length
+    headers = {**cache_headers, "Accept-Ranges": "bytes"}
+    status_code = 200
+    start, end = 0, length - 1
+    range_header = request.headers.get("range")
+    if range_header and etag_matches(request.headers.get("if-range", etag), etag):
+        try:
+            byte_range = _parse_range(range_header, length)
+        except RangeNotSatisfiable:
+            raise HTTPException(
+                status_code=416, detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{length}"}
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+    headers["Content-Length"] = str(end - start + 1 if length else 0)
+    metadata = grid_out.metadata or {}
+
+    async def body():
+        if length:
+            grid_out.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await grid_out.read(min(PHOTO_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        status_code=status_code,
+        media_type=metadata.get("contentType") or "application/octet-stream",
+        headers=headers,
+    )
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def _parse_range(header: str, length: int):
+    """Parse a single `bytes=start-end` range.
+
+    Returns None when the header is to be ignored and the whole file sent: another unit,
+    several ranges (which we may serve as a 200) or a malformed spec. Raises
+    RangeNotSatisfiable for a byte range that lies outside the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else None
+        else:
+            # Suffix range: the final N bytes
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            start = max(0, length - suffix)
+            end = length - 1
+    except ValueError:
+        return None
+    if start < 0 or (end is not None and end < start):
+        return None  # not a valid byte range (e.g. "bytes=5-2"), so ignored
+    if start >= length:
+        raise RangeNotSatisfiable()
+    return start, length - 1 if end is None else min(end, length - 1)
+
 @router.put("/profile")
 async def update_profile(
     profile_data: dict = Body(...),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
-    token = credentials.credentials
+    allowed_fields = [
+        'name', 'phone', 'dateOfBirth', 'gender', 'bloodGroup',
+        'address', 'emergencyContact', 'hobbies', 'skills', 'cgpa',
+        'email', 'rollNumber', 'department', 'year', 'semester', 'photo'
+    ]
+    update_data = {k: v for k, v in profile_data.items() if k in allowed_fields}
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No valid fields to update")
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        allowed_fields = [
-            'name', 'phone', 'dateOfBirth', 'gender', 'bloodGroup',
-            'address', 'emergencyContact', 'hobbies', 'skills', 'cgpa',
-            'email', 'rollNumber', 'department', 'year', 'semester', 'photo'
-        ]
-        update_data = {k: v for k, v in profile_data.items() if k in allowed_fields}
-        if not update_data:
-            raise HTTPException(status_code=400, detail="No valid fields to update")
-        await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": update_data})
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
+        updated = await db.users.find_one_and_update(
+            {"_id": ObjectId(user["_id"])},
+            {"$set": update_data},
+            projection={"password": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        invalidate_user(user["_id"])
+        if not updated:
             raise HTTPException(status_code=404, detail="User not found")
-        user.pop("password", None)
-        user["_id"] = str(user["_id"])
-        return {"message": "Profile updated successfully", "user": user}
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
+        updated["_id"] = str(updated["_id"])
+        return {"message": "Profile updated successfully", "user": updated}
+    except HTTPException:
+        raise
     except Exception as e:
-        return JSONResponse(status_code=500, content={"detail": f"Profile update failed: {str(e)}"}) 
\ No newline at end of file
+        return JSONResponse(status_code=500, content={"detail": f"Profile update failed: {str(e)}"})
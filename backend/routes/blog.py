@@ -1,28 +1,114 @@
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Query, Request, Response, Body
+from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
-from models.blog import BlogPostCreate, BlogPostResponse, BlogPostUpdate, LikeInfo, Comment
-from db import db
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from models.blog import BlogPostCreate, BlogPostResponse, BlogPostSummary, BlogPostUpdate, LikeInfo, Comment, CommentCreate, CommentResponse
+from db import db, feed_db
+from dependencies import get_current_user
+from pagination import KeysetStream, encode_cursor, decode_cursor
+from cache import ResponseCache, etag_matches
+from storage import get_media_storage, UploadTooLarge
+from search import prefix_query, search_terms
+from facets import get_facets, record_posts
+from comments import comment_docs_from_embedded
+from serialization import PREVIEW_LENGTH, post_summary, post_response, comment_response, render_json, FastJSONResponse
+from events import event_bus, post_created, post_updated, comment_added
+from likes import LIKE_WRITE_BEHIND, LikeBuffer, PostNotFound
+from broadcast import broadcaster
+from hot import activity_update, current_anchor, rescale_score, set_hot_fields
 import os
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-try:
-    import cloudinary  # type: ignore
-    import cloudinary.uploader  # type: ignore
-except ImportError:
-    cloudinary = None
 from dotenv import load_dotenv
 
 router = APIRouter(prefix="/api/blog", tags=["blog"])
 
-# Mount static directory for serving images
-STATIC_DIR = os.path.join(os.path.dirname(__file__), '..', 'static')
-BLOG_IMG_DIR = os.path.join(STATIC_DIR, 'blog_images')
-os.makedirs(BLOG_IMG_DIR, exist_ok=True)
+# Feed page sizes for keyset pagination
+FEED_PAGE_SIZE = 50
+FEED_MAX_PAGE_SIZE = 100
 
-# In main.py or app.py, add:
-# app.mount('/static', StaticFiles(directory=STATIC_DIR), name='static')
+# POST /posts/batch resolves at most this many ids with one $in query
+POSTS_BATCH_MAX = int(os.getenv("POSTS_BATCH_MAX", "100"))
+
+# Relevance search pages with skip/limit, so it stops after SEARCH_MAX_RESULTS hits
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_RESULTS = 500
+
+# Serialized feed and category responses, invalidated by the write paths below
+feed_cache = ResponseCache(
+    maxsize=int(os.getenv("FEED_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("FEED_CACHE_TTL", "30")),
+)
+
+def _apply_feed_invalidation(tags):
+    if tags is None:
+        feed_cache.clear()
+    else:
+        feed_cache.invalidate(*tags)
+
+# Invalidations reach the feed caches of every worker (see broadcast.py)
+broadcaster.subscribe("feed", _apply_feed_invalidation)
+
+def invalidate_feed(*tags):
+    broadcaster.publish("feed", list(tags))
+
+def clear_feed():
+    broadcaster.publish("feed", None)
+
+# Likes live in the post_likes collection; the post detail only carries the newest few
+RECENT_LIKES_LIMIT = 20
+
+# With LIKE_WRITE_BEHIND=1 like toggles are buffered and written in batches (see likes.py);
+# started and flushed by the app lifespan
+like_buffer = LikeBuffer(
+    db, on_flush=lambda post_ids: invalidate_feed(*(f"post:{oid}" for oid in post_ids))
+) if LIKE_WRITE_BEHIND else None
+
+# Comments live in the post_comments collection and are paged oldest first
+COMMENTS_PAGE_SIZE = 20
+COMMENTS_MAX_PAGE_SIZE = 100
+REPLIES_PREVIEW_LIMIT = 3
+
+# Feed listings only carry card fields; counts and the preview are computed by MongoDB
+# so the likes/comments arrays and the full content never leave the server.
+FEED_PREVIEW_LENGTH = PREVIEW_LENGTH
+_content = {"$ifNull": ["$content", ""]}
+FEED_PROJECTION = {
+    "type": 1,
+    "title": 1,
+    "excerpt": 1,
+    "author": 1,
+    "date": 1,
+    "category": 1,
+    "read_time": 1,
+    "image": 1,
+    "tags": 1,
+    "document_url": 1,
+    "job_link": 1,
+    "referral_info": 1,
+    # Posts not yet migrated to the post_likes collection still carry an embedded array
+    "like_count": {"$ifNull": ["$like_count", {"$size": {"$ifNull": ["$likes", []]}}]},
+    "comment_count": {"$ifNull": ["$comment_count", {"$size": {"$ifNull": ["$comments", []]}}]},
+    "content_preview": {
+        "$cond": [
+            {"$gt": [{"$strLenCP": _content}, FEED_PREVIEW_LENGTH]},
+            {"$concat": [{"$substrCP": [_content, 0, FEED_PREVIEW_LENGTH]}, "..."]},
+            _content,
+        ]
+    },
+}
+# The hot feed's keyset position needs the score
+HOT_FEED_PROJECTION = {**FEED_PROJECTION, "hot_score": 1}
+
+
+def _cached_json_response(request: Request, entry) -> Response:
+    """Serve a cached feed response, or a bodiless 304 when the client already has it."""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers={**headers, **entry.headers})
 
 # Sample blog posts data for initialization
 SAMPLE_IMAGE_URLS = [
@@ -53,7 +139,7 @@ SAMPLE_POSTS = [
         "tags": ["Mathematics", "Graph Theory", "CS201"],
         "document_url": "https://res.cloudinary.com/demo/raw/upload/v1710000000/graph_theory_notes.pdf",
         "content": "These notes cover all important concepts in Graph Theory for CS201.",
-        "likes": [],
+        "like_count": 0,
         "date": datetime.utcnow()
     },
     # Job post
@@ -67,7 +153,7 @@ SAMPLE_POSTS = [
         "job_link": "https://careers.google.com/jobs/results/123456-software-engineer-intern/",
         "referral_info": "Contact alumni Priya S. for referral.",
         "content": "Google is hiring interns for Summer 2024. See link for details.",
-        "likes": [],
+        "like_count": 0,
         "date": datetime.utcnow()
     },
     # Thread post
@@ -79,7 +165,7 @@ SAMPLE_POSTS = [
         "category": "Threads",
         "read_time": "3 min read",
         "content": "Let's discuss the best strategies and materials for GATE CS.",
-        "likes": [],
+        "like_count": 0,
         "comments": [
             {
                 "user_id": "user_sneha",
@@ -110,54 +196,185 @@ SAMPLE_POSTS = [
 
 load_dotenv()
 
-if cloudinary is not None:
-    cloudinary.config(
-        cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-        api_key=os.getenv('CLOUDINARY_API_KEY'),
-        api_secret=os.getenv('CLOUDINARY_API_SECRET')
-    )
-
-@router.get("/posts", response_model=List[BlogPostResponse])
-async def get_all_posts():
-    """Get all blog posts, alternating 1 job, 1 non-job post in order."""
+async def _read_feed_page(limit: int, cursor: Optional[str]):
+    """Read one feed page, alternating 1 job, 1 non-job post. Returns (summaries, next_cursor)."""
+    try:
+        state = decode_cursor(cursor) if cursor else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    turn = state.get("turn", "job")
+    if turn not in ("job", "other"):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        streams = {
+            "job": KeysetStream(feed_db.blog_posts, {"type": "job"}, "date", -1, state.get("job"), limit, FEED_PROJECTION),
+            "other": KeysetStream(feed_db.blog_posts, {"type": {"$ne": "job"}}, "date", -1, state.get("other"), limit, FEED_PROJECTION),
+        }
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     try:
-        all_posts = await db.blog_posts.find().sort("date", -1).to_list(length=200)
-        job_posts = [post for post in all_posts if post.get("type") == "job"]
-        other_posts = [post for post in all_posts if post.get("type") != "job"]
         alternated = []
-        i = j = 0
-        # Alternate 1 job, 1 non-job
-        while i < len(job_posts) or j < len(other_posts):
-            if i < len(job_posts):
-                alternated.append(job_posts[i])
-                i += 1
-            if j < len(other_posts):
-                alternated.append(other_posts[j])
-                j += 1
-        return [
-            {
-                "id": str(post["_id"]),
-                "type": post.get("type"),
-                "title": post["title"],
-                "excerpt": post["excerpt"],
-                "author": post["author"],
-                "date": post["date"],
-                "category": post["category"],
-                "read_time": post["read_time"],
-                "image": post.get("image"),
-                "tags": post.get("tags", []),
-                "likes": post.get("likes", []),
-                "like_count": len(post.get("likes", [])),
-                "content": post.get("content"),
-                "comments": post.get("comments", []),
-                "document_url": post.get("document_url"),
-                "job_link": post.get("job_link"),
-                "referral_info": post.get("referral_info"),
-            }
-            for post in alternated
-        ]
+        # Alternate 1 job, 1 non-job; once one side runs out, drain the other
+        while len(alternated) < limit:
+            other = "other" if turn == "job" else "job"
+            post = await streams[turn].next()
+            if post is None:
+                post = await streams[other].next()
+                if post is None:
+                    break
+                turn = other
+            alternated.append(post)
+            turn = "other" if turn == "job" else "job"
+        next_cursor = None
+        if await streams["job"].peek() is not None or await streams["other"].peek() is not None:
+            next_cursor = encode_cursor({
+                "turn": turn,
+                "job": streams["job"].position,
+                "other": streams["other"].position,
+            })
+        return [post_summary(post) for post in alternated], next_cursor
+    finally:
+        for stream in streams.values():
+            await stream.close()
+
+async def _read_hot_page(limit: int, cursor: Optional[str]):
+    """Read one page of the hot feed (see hot.py). Returns (summaries, next_cursor)."""
+    try:
+        state = decode_cursor(cursor) if cursor else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    anchor = await current_anchor(db)
+    try:
+        after = state.get("after")
+        if after and state.get("anchor") != anchor:
+            # The anchor moved since this cursor was issued; scores were rescaled with it
+            after = [rescale_score(after[0], state["anchor"], anchor), after[1]]
+        stream = KeysetStream(feed_db.blog_posts, {"hot_anchor": anchor}, "hot_score", -1, after, limit, HOT_FEED_PROJECTION)
+    except (ValueError, TypeError, KeyError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        posts = []
+        while len(posts) < limit and (post := await stream.next()) is not None:
+            posts.append(post)
+        next_cursor = None
+        if await stream.peek() is not None:
+            next_cursor = encode_cursor({"anchor": anchor, "after": stream.position})
+        return [post_summary(post) for post in posts], next_cursor
+    finally:
+        await stream.close()
+
+@router.get("/posts", response_model=List[BlogPostSummary])
+async def get_all_posts(
+    request: Request,
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("latest", pattern="^(latest|hot)$"),
+):
+    """Get a page of blog posts.
+
+    sort=latest (the default) alternates 1 job, 1 non-job post, newest first; sort=hot ranks
+    posts by recency, likes and comments. The cursor for the next page is returned in the
+    X-Next-Cursor header.
+    """
+    key = ("feed", sort, limit, cursor)
+    entry = feed_cache.get(key)
+    if entry is None:
+        generation = feed_cache.generation
+        try:
+            if sort == "hot":
+                posts, next_cursor = await _read_hot_page(limit, cursor)
+            else:
+                posts, next_cursor = await _read_feed_page(limit, cursor)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching posts: {str(e)}")
+        tags = {f"post:{post['id']}" for post in posts}
+        if sort == "hot":
+            # New posts can rank anywhere; likes elsewhere reorder it within FEED_CACHE_TTL
+            tags.add("feed:hot")
+        elif cursor is None:
+            # Only the first page can gain new posts; later pages are pinned by their cursor
+            tags.add("feed:head")
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        entry = feed_cache.put(key, render_json(posts), tags, headers, generation)
+    return _cached_json_response(request, entry)
+
+@router.get("/search", response_model=List[BlogPostSummary])
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    prefix: bool = False,
+):
+    """Search posts by title, excerpt, content and tags.
+
+    Results are ranked by text relevance with newer posts first on ties. With prefix=true the
+    last word is matched as a prefix of title and tag words (for type-ahead), newest first.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        state = decode_cursor(cursor) if cursor else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = {}
+    try:
+        if prefix:
+            query = prefix_query(q)
+            if query is None:
+                return FastJSONResponse([])
+            stream = KeysetStream(feed_db.blog_posts, query, "date", -1, state.get("after"), limit, FEED_PROJECTION)
+            try:
+                posts = []
+                while len(posts) < limit and (post := await stream.next()) is not None:
+                    posts.append(post)
+                if await stream.peek() is not None:
+                    headers["X-Next-Cursor"] = encode_cursor({"after": stream.position})
+            finally:
+                await stream.close()
+        else:
+            offset = state.get("offset", 0)
+            if not isinstance(offset, int) or offset < 0 or offset >= SEARCH_MAX_RESULTS:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            posts = await feed_db.blog_posts.find(
+                {"$text": {"$search": q}},
+                {**FEED_PROJECTION, "score": {"$meta": "textScore"}},
+            ).sort([
+                ("score", {"$meta": "textScore"}), ("date", -1), ("_id", -1)
+            ]).skip(offset).limit(limit + 1).to_list(length=limit + 1)
+            if len(posts) > limit and offset + limit < SEARCH_MAX_RESULTS:
+                headers["X-Next-Cursor"] = encode_cursor({"offset": offset + limit})
+            posts = posts[:limit]
+        return FastJSONResponse([post_summary(post) for post in posts], headers=headers)
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching posts: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching posts: {str(e)}")
+
+@router.get("/facets")
+async def get_post_facets(tags: int = Query(50, ge=0, le=500)):
+    """Post counts per category and type, plus the most used tags"""
+    try:
+        return await get_facets(db, tag_limit=tags)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching facets: {str(e)}")
+
+@router.get("/events")
+async def stream_events():
+    """Server-Sent Events for new posts, comments and changed like/comment counts.
+
+    A "resync" event means events were missed; the client should refetch what it shows.
+    """
+    subscription = event_bus.subscribe()
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Too many live connections", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        event_bus.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/posts/{post_id}", response_model=BlogPostResponse)
 async def get_post(post_id: str):
@@ -166,126 +383,155 @@ async def get_post(post_id: str):
         post = await db.blog_posts.find_one({"_id": ObjectId(post_id)})
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
-        return {
-            "id": str(post["_id"]),
-            "type": post.get("type"),
-            "title": post["title"],
-            "excerpt": post["excerpt"],
-            "author": post["author"],
-            "date": post["date"],
-            "category": post["category"],
-            "read_time": post["read_time"],
-            "image": post.get("image"),
-            "tags": post.get("tags", []),
-            "likes": post.get("likes", []),
-            "like_count": len(post.get("likes", [])),
-            "content": post.get("content"),
-            "comments": post.get("comments", []),
-            "document_url": post.get("document_url"),
-            "job_link": post.get("job_link"),
-            "referral_info": post.get("referral_info"),
-        }
+        likes = await db.post_likes.find(
+            {"post_id": post["_id"]}, {"_id": 0, "user_id": 1, "user_name": 1, "liked_at": 1}
+        ).sort("liked_at", -1).to_list(length=RECENT_LIKES_LIMIT)
+        if like_buffer is not None:
+            post["like_count"] = like_buffer.like_count(post["_id"], post.get("like_count", len(likes)))
+        return FastJSONResponse(post_response(post, likes))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching post: {str(e)}")
 
+@router.post("/posts/batch")
+async def get_posts_batch(post_ids: List[str] = Body(..., embed=True)):
+    """Card fields (BlogPostSummary) of several posts, e.g. to hydrate a list of bookmarks.
+
+    Results follow the order of post_ids; an id that is malformed or has no post gets
+    {"id": ..., "error": "not_found"} in its place.
+    """
+    if len(post_ids) > POSTS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {POSTS_BATCH_MAX} post ids are allowed")
+    try:
+        oids = {pid: ObjectId(pid) for pid in post_ids if ObjectId.is_valid(pid)}
+        posts = {}
+        if oids:
+            async for post in db.blog_posts.find({"_id": {"$in": list(set(oids.values()))}}, FEED_PROJECTION):
+                posts[post["_id"]] = post
+        results = []
+        for pid in post_ids:
+            post = posts.get(oids.get(pid))
+            if post is None:
+                results.append({"id": pid, "error": "not_found"})
+                continue
+            summary = post_summary(post)
+            if like_buffer is not None:
+                summary["like_count"] = like_buffer.like_count(post["_id"], summary["like_count"])
+            results.append(summary)
+        return FastJSONResponse({"posts": results})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching posts: {str(e)}")
+
 @router.post("/posts", response_model=BlogPostResponse)
-async def create_post(post: BlogPostCreate):
+async def create_post(post: BlogPostCreate, user: dict = Depends(get_current_user)):
     """Create a new blog post"""
     try:
         post_data = post.dict()
+        post_data["author_id"] = user["_id"]
         post_data["date"] = datetime.utcnow()
-        post_data["likes"] = []
-        if "comments" not in post_data:
-            post_data["comments"] = []
-        result = await db.blog_posts.insert_one(post_data)
-        created_post = await db.blog_posts.find_one({"_id": result.inserted_id})
-        if not created_post:
-            raise HTTPException(status_code=500, detail="Error retrieving created post")
-        return {
-            "id": str(created_post["_id"]),
-            "title": created_post["title"],
-            "excerpt": created_post["excerpt"],
-            "author": created_post["author"],
-            "date": created_post["date"],
-            "category": created_post["category"],
-            "read_time": created_post["read_time"],
-            "image": created_post["image"],
-            "tags": created_post["tags"],
-            "likes": created_post.get("likes", []),
-            "like_count": len(created_post.get("likes", [])),
-            "content": created_post.get("content"),
-            "comments": created_post.get("comments", [])
-        }
+        post_data["like_count"] = 0
+        post_data["_id"] = ObjectId()
+        comment_docs = comment_docs_from_embedded(post_data["_id"], post_data.pop("comments", None))
+        post_data["comment_count"] = len(comment_docs)
+        post_data["search_terms"] = search_terms(post_data)
+        set_hot_fields(post_data, await current_anchor(db))
+        await db.blog_posts.insert_one(post_data)
+        if comment_docs:
+            await db.post_comments.insert_many(comment_docs)
+        await record_posts(db, [post_data])
+        invalidate_feed("feed:head", "feed:hot", f"category:{post_data['category']}")
+        event_bus.publish(post_created(post_data))
+        return FastJSONResponse(post_response(post_data))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating post: {str(e)}")
 
 @router.post("/posts/{post_id}/like")
-async def like_post(post_id: str, user_info: dict):
-    """Like a blog post"""
+async def like_post(post_id: str, user: dict = Depends(get_current_user)):
+    """Toggle a like on a blog post.
+
+    The unique (post_id, user_id) index on post_likes makes the insert the toggle: a duplicate
+    key means the user already liked the post, so the like is removed instead.
+    """
     try:
-        # Check if post exists
-        post = await db.blog_posts.find_one({"_id": ObjectId(post_id)})
+        oid = ObjectId(post_id)
+        if like_buffer is not None:
+            return await _buffered_like(oid, user)
+        try:
+            await db.post_likes.insert_one({
+                "post_id": oid,
+                "user_id": user["_id"],
+                "user_name": user.get("name", ""),
+                "liked_at": datetime.utcnow()
+            })
+            liked, delta = True, 1
+        except DuplicateKeyError:
+            result = await db.post_likes.delete_one({"post_id": oid, "user_id": user["_id"]})
+            liked, delta = False, -result.deleted_count
+        post = await db.blog_posts.find_one_and_update(
+            {"_id": oid},
+            activity_update(like_count=delta),
+            projection={"like_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
         if not post:
+            if liked:
+                await db.post_likes.delete_one({"post_id": oid, "user_id": user["_id"]})
             raise HTTPException(status_code=404, detail="Post not found")
-        
-        # Check if user already liked
-        existing_like = next(
-            (like for like in post.get("likes", []) if like["user_id"] == user_info["user_id"]), 
-            None
-        )
-        
-        if existing_like:
-            # Unlike the post
-            await db.blog_posts.update_one(
-                {"_id": ObjectId(post_id)},
-                {"$pull": {"likes": {"user_id": user_info["user_id"]}}}
-            )
-            return {"message": "Post unliked successfully", "liked": False}
-        else:
-            # Like the post
-            like_data = {
-                "user_id": user_info["user_id"],
-                "user_name": user_info["user_name"],
-                "liked_at": datetime.utcnow()
-            }
-            await db.blog_posts.update_one(
-                {"_id": ObjectId(post_id)},
-                {"$push": {"likes": like_data}}
-            )
-            return {"message": "Post liked successfully", "liked": True}
-            
+        invalidate_feed(f"post:{oid}")
+        event_bus.publish(post_updated(oid, like_count=post["like_count"]))
+        message = "Post liked successfully" if liked else "Post unliked successfully"
+        return {"message": message, "liked": liked, "like_count": post["like_count"]}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error liking post: {str(e)}")
 
-@router.get("/posts/category/{category}")
-async def get_posts_by_category(category: str):
-    """Get posts by category"""
+async def _buffered_like(oid: ObjectId, user: dict):
     try:
-        posts = await db.blog_posts.find({"category": category}).to_list(length=100)
-        return [
-            {
-                "id": str(post["_id"]),
-                "type": post.get("type"),
-                "title": post["title"],
-                "excerpt": post["excerpt"],
-                "author": post["author"],
-                "date": post["date"],
-                "category": post["category"],
-                "read_time": post["read_time"],
-                "image": post.get("image"),
-                "tags": post.get("tags", []),
-                "likes": post.get("likes", []),
-                "like_count": len(post.get("likes", [])),
-                "content": post.get("content"),
-                "comments": post.get("comments", []),
-                "document_url": post.get("document_url"),
-                "job_link": post.get("job_link"),
-                "referral_info": post.get("referral_info"),
-            }
-            for post in posts
-        ]
+        liked, like_count = await like_buffer.toggle(oid, user)
+    except PostNotFound:
+        raise HTTPException(status_code=404, detail="Post not found")
+    event_bus.publish(post_updated(oid, like_count=like_count))
+    message = "Post liked successfully" if liked else "Post unliked successfully"
+    return {"message": message, "liked": liked, "like_count": like_count}
+
+@router.post("/likes/status")
+async def get_like_status(post_ids: List[str] = Body(..., embed=True), user: dict = Depends(get_current_user)):
+    """Return which of the given posts the current user has liked"""
+    if len(post_ids) > FEED_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {FEED_MAX_PAGE_SIZE} post ids are allowed")
+    try:
+        oids = [ObjectId(pid) for pid in post_ids if ObjectId.is_valid(pid)]
+        likes = await db.post_likes.find(
+            {"post_id": {"$in": oids}, "user_id": user["_id"]}, {"_id": 0, "post_id": 1}
+        ).to_list(length=len(oids))
+        liked = {like["post_id"] for like in likes}
+        if like_buffer is not None:
+            # Toggles not flushed yet win over what MongoDB has
+            for oid in oids:
+                buffered = like_buffer.liked(oid, user["_id"])
+                if buffered is not None:
+                    (liked.add if buffered else liked.discard)(oid)
+        return {"liked": [str(oid) for oid in dict.fromkeys(oids) if oid in liked]}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching posts: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching like status: {str(e)}")
+
+@router.get("/posts/category/{category}", response_model=List[BlogPostSummary])
+async def get_posts_by_category(category: str, request: Request):
+    """Get posts by category"""
+    key = ("category", category)
+    entry = feed_cache.get(key)
+    if entry is None:
+        generation = feed_cache.generation
+        try:
+            posts = await feed_db.blog_posts.find({"category": category}, FEED_PROJECTION).sort("date", -1).to_list(length=100)
+            posts = [post_summary(post) for post in posts]
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching posts: {str(e)}")
+        tags = {f"post:{post['id']}" for post in posts} | {f"category:{category}"}
+        entry = feed_cache.put(key, render_json(posts), tags, generation=generation)
+    return _cached_json_response(request, entry)
 
 @router.post("/initialize")
 async def initialize_blog_posts():
@@ -296,58 +542,128 @@ async def initialize_blog_posts():
         if existing_count > 0:
             return {"message": "Blog posts already initialized", "count": existing_count}
         
-        # Insert sample posts
-        for post in SAMPLE_POSTS:
+        # Insert sample posts, moving their embedded comments into post_comments
+        anchor = await current_anchor(db)
+        posts = []
+        for sample in SAMPLE_POSTS:
+            post = {k: v for k, v in sample.items() if k != "comments"}
+            post["_id"] = ObjectId()
+            comment_docs = comment_docs_from_embedded(post["_id"], sample.get("comments"))
+            post["comment_count"] = len(comment_docs)
+            post["search_terms"] = search_terms(post)
+            set_hot_fields(post, anchor)
             await db.blog_posts.insert_one(post)
-        
+            if comment_docs:
+                await db.post_comments.insert_many(comment_docs)
+            posts.append(post)
+        await record_posts(db, posts)
+        clear_feed()
         return {"message": "Blog posts initialized successfully", "count": len(SAMPLE_POSTS)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error initializing posts: {str(e)}")
 
-@router.post("/posts/{post_id}/comments")
-async def add_comment(post_id: str, comment: Comment):
-    """Add a comment to a blog post"""
+@router.post("/posts/{post_id}/comments", response_model=CommentResponse)
+async def add_comment(post_id: str, comment: CommentCreate, user: dict = Depends(get_current_user)):
+    """Add a comment, or a reply when parent_id is set, to a blog post"""
+    if not ObjectId.is_valid(post_id) or (comment.parent_id and not ObjectId.is_valid(comment.parent_id)):
+        raise HTTPException(status_code=400, detail="Invalid post or parent comment id")
     try:
-        post = await db.blog_posts.find_one({"_id": ObjectId(post_id)})
+        oid = ObjectId(post_id)
+        parent_id = None
+        if comment.parent_id:
+            parent = await db.post_comments.find_one(
+                {"_id": ObjectId(comment.parent_id), "post_id": oid}, {"parent_id": 1}
+            )
+            if not parent:
+                raise HTTPException(status_code=404, detail="Parent comment not found")
+            # Threads are one level deep: replies to a reply join the top-level comment's thread
+            parent_id = parent.get("parent_id") or parent["_id"]
+        comment_doc = {
+            "post_id": oid,
+            "parent_id": parent_id,
+            "user_id": user["_id"],
+            "user_name": user.get("name", ""),
+            "text": comment.text,
+            "created_at": datetime.utcnow(),
+        }
+        if parent_id is None:
+            comment_doc["reply_count"] = 0
+        result = await db.post_comments.insert_one(comment_doc)
+        post = await db.blog_posts.find_one_and_update(
+            {"_id": oid}, activity_update(comment_count=1), projection={"comment_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
         if not post:
+            await db.post_comments.delete_one({"_id": result.inserted_id})
             raise HTTPException(status_code=404, detail="Post not found")
-        comment_dict = comment.dict()
-        await db.blog_posts.update_one(
-            {"_id": ObjectId(post_id)},
-            {"$push": {"comments": comment_dict}}
-        )
-        return {"message": "Comment added successfully"}
+        if parent_id is not None:
+            await db.post_comments.update_one({"_id": parent_id}, {"$inc": {"reply_count": 1}})
+        invalidate_feed(f"post:{oid}")
+        event_bus.publish(comment_added(comment_doc))
+        event_bus.publish(post_updated(oid, comment_count=post["comment_count"]))
+        return FastJSONResponse(comment_response(comment_doc))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding comment: {str(e)}")
 
-@router.get("/posts/{post_id}/comments")
-async def get_comments(post_id: str):
-    """Get all comments for a blog post"""
+@router.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
+async def get_comments(
+    post_id: str,
+    limit: int = Query(COMMENTS_PAGE_SIZE, ge=1, le=COMMENTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    parent_id: Optional[str] = None,
+):
+    """Get a page of comments for a blog post, oldest first.
+
+    Top-level comments come with their first few replies; pass parent_id to page through
+    a whole thread. The cursor for the next page is returned in the X-Next-Cursor header.
+    """
     try:
-        post = await db.blog_posts.find_one({"_id": ObjectId(post_id)})
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-        return post.get("comments", [])
+        state = decode_cursor(cursor) if cursor else {}
+        oid = ObjectId(post_id)
+        query = {"post_id": oid, "parent_id": ObjectId(parent_id) if parent_id else None}
+        stream = KeysetStream(db.post_comments, query, "created_at", 1, state.get("after"), limit)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid comments query")
+    headers = {}
+    try:
+        comments = []
+        while len(comments) < limit:
+            comment = await stream.next()
+            if comment is None:
+                break
+            comments.append(comment)
+        if await stream.peek() is not None:
+            headers["X-Next-Cursor"] = encode_cursor({"after": stream.position})
+        if parent_id is None and comments:
+            previews = await db.post_comments.aggregate([
+                {"$match": {"post_id": oid, "parent_id": {"$in": [c["_id"] for c in comments]}}},
+                {"$sort": {"created_at": 1, "_id": 1}},
+                {"$group": {
+                    "_id": "$parent_id",
+                    "replies": {"$firstN": {"input": "$$ROOT", "n": REPLIES_PREVIEW_LIMIT}},
+                }},
+            ]).to_list(length=None)
+            replies = {preview["_id"]: preview["replies"] for preview in previews}
+            for comment in comments:
+                comment["replies"] = replies.get(comment["_id"], [])
+        return FastJSONResponse([comment_response(comment) for comment in comments], headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching comments: {str(e)}")
+    finally:
+        await stream.close()
 
 @router.post('/upload-image')
-async def upload_post_image(file: UploadFile = File(...)):
-    """Upload an image or document for a post to Cloudinary and return its URL"""
+async def upload_post_image(request: Request, file: UploadFile = File(...)):
+    """Upload an image or document for a post to the configured media storage and return its URL"""
     try:
-        contents = await file.read()
-        if cloudinary is not None:
-            upload_result = cloudinary.uploader.upload(
-                contents,
-                resource_type="auto",
-                folder="student_hub/posts/"
-            )
-            url = upload_result.get('secure_url')
-            if not url:
-                raise Exception('Cloudinary upload failed')
-            return {"url": url}
-        else:
-            raise Exception('Cloudinary is not configured')
+        url = await get_media_storage().save(file)
+        if url.startswith("/"):
+            url = str(request.base_url).rstrip("/") + url
+        return {"url": url}
+    except UploadTooLarge:
+        return JSONResponse(status_code=413, content={"detail": "Upload is too large"})
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"Image upload failed: {str(e)}"})
 
@@ -374,7 +690,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.microsoft.com/us/en/job/12345/Backend-Developer-Intern',
             'referral_info': 'Contact alumni Ravi K. for referral.',
             'content': 'Microsoft is hiring backend interns for Summer 2024. See link for details.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -387,7 +703,7 @@ async def seed_more_posts():
             'job_link': 'https://www.amazon.jobs/en/jobs/67890/Data-Analyst',
             'referral_info': 'Reach out to alumni Sneha S. for referral.',
             'content': 'Apply for Data Analyst roles at Amazon. Great for freshers.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -400,7 +716,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.swiggy.com/job/54321/Frontend-Engineer',
             'referral_info': 'Contact Mohit for referral.',
             'content': 'Swiggy is looking for frontend engineers for their web team.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -413,7 +729,7 @@ async def seed_more_posts():
             'job_link': 'https://www.tcs.com/careers/ml-intern',
             'referral_info': 'Contact Deekshith for referral.',
             'content': 'Work on real ML projects at TCS. Apply now!',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -426,7 +742,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.infosys.com/job/98765/Software-Engineer',
             'referral_info': 'Contact Akhilesh for referral.',
             'content': 'Infosys is looking for software engineers for multiple teams.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -439,7 +755,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.zohocorp.com/jobs/24680/UI-UX-Designer',
             'referral_info': 'Contact Tanukj for referral.',
             'content': 'Zoho is looking for creative UI/UX designers.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -452,7 +768,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.ibm.com/job/13579/Cloud-Engineer',
             'referral_info': 'Contact Rinaaz for referral.',
             'content': 'IBM is looking for Cloud Engineers to work on next-gen cloud solutions.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -465,7 +781,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.flipkart.com/job/24680/DevOps-Engineer',
             'referral_info': 'Contact Mohit for referral.',
             'content': 'Flipkart is looking for DevOps Engineers for their cloud team.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -478,7 +794,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.deloitte.com/job/35791/Cybersecurity-Analyst',
             'referral_info': 'Contact Akhilesh for referral.',
             'content': 'Deloitte is looking for Cybersecurity Analysts for their security team.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -491,7 +807,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.byjus.com/job/46802/Product-Manager',
             'referral_info': 'Contact Tanukj for referral.',
             'content': 'Byju’s is looking for Product Managers to drive innovation.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -504,7 +820,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.ola.com/job/57913/Android-Developer',
             'referral_info': 'Contact Deekshith for referral.',
             'content': 'Ola is looking for Android Developers for their mobile team.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         },
         {
@@ -517,7 +833,7 @@ async def seed_more_posts():
             'job_link': 'https://careers.paytm.com/job/68024/QA-Engineer',
             'referral_info': 'Contact Bahrath M for referral.',
             'content': 'Paytm is looking for QA Engineers to test and improve their products.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow()
         }
     ]
@@ -537,9 +853,9 @@ async def seed_more_posts():
             'read_time': f'{3 + (i % 7)} min read',
             'tags': [cat, 'Sample'],
             'content': f'This is the full content of sample {post_type} post {i+1}.',
-            'likes': [],
+            'like_count': 0,
             'date': datetime.utcnow(),
-            'comments': []
+            'comment_count': 0
         }
         note_and_thread_posts.append(post)
     # Interleave job_posts and note_and_thread_posts for 1:1 ratio
@@ -550,5 +866,11 @@ async def seed_more_posts():
             posts.append(job_posts[i])
         if i < len(note_and_thread_posts):
             posts.append(note_and_thread_posts[i])
+    anchor = await current_anchor(db)
+    for post in posts:
+        post['search_terms'] = search_terms(post)
+        set_hot_fields(post, anchor)
     await db.blog_posts.insert_many(posts)
+    await record_posts(db, posts)
+    clear_feed()
     return {'message': 'Seeded more posts (alternating jobs and others)', 'count': len(posts)} 
\ No newline at end of file
@@ -1,16 +1,19 @@
+"""Delete every blog post from the MONGO_DB database, with its likes, comments and facet counts.
+
+Run from the backend directory: python -m scripts.clear_blog_posts
+"""
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+from db import client, db
 
-MONGO_URI = "mongodb://localhost:27017"
-DB_NAME = "student_collaboration_hub"
-COLLECTION_NAME = "blog_posts"
+# Collections holding data that belongs to posts; left behind they would outlive them
+# (post_facets counts would still be served by /api/blog/facets)
+POST_COLLECTIONS = ["blog_posts", "post_likes", "post_comments", "post_facets"]
 
 async def clear_blog_posts():
-    client = AsyncIOMotorClient(MONGO_URI)
-    db = client[DB_NAME]
-    result = await db[COLLECTION_NAME].delete_many({})
-    print(f"Deleted {result.deleted_count} blog posts.")
+    for name in POST_COLLECTIONS:
+        result = await db[name].delete_many({})
+        print(f"Deleted {result.deleted_count} documents from {name}.")
     client.close()
 
 if __name__ == "__main__":
-    asyncio.run(clear_blog_posts()) 
\ No newline at end of file
+    asyncio.run(clear_blog_posts())
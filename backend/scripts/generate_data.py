@@ -0,0 +1,228 @@
+"""Generate a large synthetic dataset for load testing.
+
+Creates N users and M posts spread over every post type and category, with heavy-tailed
+like and comment counts (most posts get a few, a handful get a lot), the way real feeds
+look. Everything is written with unordered insert_many in batches; --parallel keeps several
+batches in flight at once. Counters (like_count, comment_count, reply_count), search_terms,
+hot feed scores and the post_facets collection are filled in as the data is written, so the
+API can serve it immediately.
+
+Point MONGO_URI/MONGO_DB at a local mongod and run from the backend directory:
+    MONGO_URI=mongodb://localhost:27017 MONGO_DB=hub_load \\
+        python -m scripts.generate_data --users 5000 --posts 200000 --parallel 4
+
+Every generated user has the password given by --password and an email in --email-domain.
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from db import client, db
+from facets import record_posts
+from hot import current_anchor, set_hot_fields
+from indexes import ensure_indexes
+from models.user import UserCreate
+from passwords import hash_password
+from search import search_terms
+
+DEPARTMENTS = ["CSE", "ECE", "EEE", "ME", "CE", "IT"]
+TOPICS = {
+    "AI-ML": ["Neural Networks", "Transformers", "Reinforcement Learning", "Computer Vision"],
+    "Programming": ["Python", "Rust", "Data Structures", "System Design"],
+    "Telecommunications": ["5G", "Signal Processing", "Antennas", "Networking"],
+    "Study Tips": ["Exams", "GATE", "Time Management", "Revision"],
+    "Career": ["Interviews", "Resume", "Internships", "Higher Studies"],
+    "Other": ["Campus", "Events", "Clubs", "Sports"],
+}
+COMPANIES = ["Google", "Microsoft", "Amazon", "Infosys", "TCS", "Flipkart", "Zoho", "Adobe"]
+ROLES = ["Software Engineer Intern", "Data Analyst", "ML Engineer", "Backend Developer", "SDE-1"]
+WORDS = (
+    "graph tree array queue stack heap hash model layer gradient signal channel network "
+    "exam notes revision interview project resume campus semester lab assignment"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _heavy_tail(rng: random.Random, mean: float, cap: int) -> int:
+    """Pareto-distributed count with roughly the given mean, capped at `cap`."""
+    alpha = 1.5
+    return min(cap, int((rng.paretovariate(alpha) - 1) * mean * (alpha - 1)))
+
+
+def make_users(rng: random.Random, count: int, domain: str, hashed_password: str) -> list:
+    users = []
+    for i in range(count):
+        user = UserCreate(
+            name=f"Student {i}",
+            email=f"student{i}@{domain}",
+            password="unused",
+            rollNumber=f"{rng.randint(18, 24)}{rng.choice(DEPARTMENTS)}{i:05d}",
+            department=rng.choice(DEPARTMENTS),
+            year=str(rng.randint(1, 4)),
+            semester=str(rng.randint(1, 8)),
+            cgpa=round(rng.uniform(5.5, 10), 2),
+            skills=", ".join(rng.sample(WORDS, 3)),
+        ).dict()
+        user["_id"] = ObjectId()
+        user["password"] = hashed_password
+        users.append(user)
+    return users
+
+
+def make_post(rng: random.Random, author: dict, date: datetime) -> dict:
+    post_type = rng.choices(["note", "job", "thread"], weights=[3, 2, 5])[0]
+    post = {
+        "_id": ObjectId(),
+        "type": post_type,
+        "author": author["name"],
+        "author_id": str(author["_id"]),
+        "date": date,
+        "read_time": f"{rng.randint(1, 10)} min read",
+        "like_count": 0,
+        "comment_count": 0,
+    }
+    if post_type == "job":
+        company, role = rng.choice(COMPANIES), rng.choice(ROLES)
+        post.update({
+            "category": "Jobs",
+            "title": f"{role} at {company}",
+            "tags": [company, "Hiring"],
+            "job_link": f"https://careers.example.com/{company.lower()}/{post['_id']}",
+            "referral_info": f"Ask {author['name']} for a referral.",
+        })
+    else:
+        category = rng.choice(list(TOPICS))
+        tags = rng.sample(TOPICS[category], rng.randint(1, 3))
+        post.update({
+            "category": "Notes" if post_type == "note" and rng.random() < 0.5 else category,
+            "title": f"{tags[0]}: {_sentence(rng, 4)[:-1]}",
+            "tags": tags,
+        })
+        if post_type == "note":
+            post["document_url"] = f"https://example.com/notes/{post['_id']}.pdf"
+    post["excerpt"] = _sentence(rng, 12)
+    post["content"] = " ".join(_sentence(rng, 15) for _ in range(rng.randint(2, 20)))
+    post["search_terms"] = search_terms(post)
+    return post
+
+
+def make_engagement(rng: random.Random, post: dict, users: list, args, now: datetime):
+    """Likes and comments for one post; sets its counters."""
+    age = (now - post["date"]).total_seconds()
+    likers = rng.sample(users, _heavy_tail(rng, args.mean_likes, len(users)))
+    likes = [{
+        "post_id": post["_id"],
+        "user_id": str(user["_id"]),
+        "user_name": user["name"],
+        "liked_at": post["date"] + timedelta(seconds=rng.uniform(0, age)),
+    } for user in likers]
+    comments, parents = [], []
+    for _ in range(_heavy_tail(rng, args.mean_comments, args.max_comments)):
+        user = rng.choice(users)
+        parent = rng.choice(parents) if parents and rng.random() < args.reply_ratio else None
+        comment = {
+            "_id": ObjectId(),
+            "post_id": post["_id"],
+            "parent_id": parent["_id"] if parent else None,
+            "user_id": str(user["_id"]),
+            "user_name": user["name"],
+            "text": _sentence(rng, rng.randint(3, 25)),
+            "created_at": post["date"] + timedelta(seconds=rng.uniform(0, age)),
+        }
+        if parent:
+            parent["reply_count"] += 1
+            comment["created_at"] = max(comment["created_at"], parent["created_at"])
+        else:
+            comment["reply_count"] = 0
+            parents.append(comment)
+        comments.append(comment)
+    post["like_count"] = len(likes)
+    post["comment_count"] = len(comments)
+    return likes, comments
+
+
+async def write_batch(posts: list, likes: list, comments: list):
+    await db.blog_posts.insert_many(posts, ordered=False)
+    if likes:
+        await db.post_likes.insert_many(likes, ordered=False)
+    if comments:
+        await db.post_comments.insert_many(comments, ordered=False)
+    await record_posts(db, posts)
+
+
+async def generate(args):
+    rng = random.Random(args.seed)
+    await ensure_indexes(db)
+    if args.drop:
+        for name in ("blog_posts", "post_likes", "post_comments", "post_facets"):
+            await db[name].delete_many({})
+        await db.users.delete_many({"email": {"$regex": f"@{re.escape(args.email_domain)}$"}})
+
+    started = time.perf_counter()
+    hashed_password = await hash_password(args.password)
+    users = make_users(rng, args.users, args.email_domain, hashed_password)
+    for i in range(0, len(users), args.batch_size):
+        await db.users.insert_many(users[i:i + args.batch_size], ordered=False)
+    print(f"Inserted {len(users)} users.")
+
+    now = datetime.utcnow()
+    anchor = await current_anchor(db)
+    pending = set()
+    totals = {"posts": 0, "likes": 0, "comments": 0}
+    for start in range(0, args.posts, args.batch_size):
+        posts, likes, comments = [], [], []
+        for _ in range(min(args.batch_size, args.posts - start)):
+            post = make_post(rng, rng.choice(users), now - timedelta(days=rng.uniform(0, args.days)))
+            post_likes, post_comments = make_engagement(rng, post, users, args, now)
+            posts.append(set_hot_fields(post, anchor))
+            likes.extend(post_likes)
+            comments.extend(post_comments)
+        totals["posts"] += len(posts)
+        totals["likes"] += len(likes)
+        totals["comments"] += len(comments)
+        pending.add(asyncio.ensure_future(write_batch(posts, likes, comments)))
+        if len(pending) >= args.parallel:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        print(f"  {totals['posts']}/{args.posts} posts", end="\r", flush=True)
+    for task in asyncio.as_completed(pending):
+        await task
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Inserted {totals['posts']} posts, {totals['likes']} likes and "
+        f"{totals['comments']} comments in {elapsed:.1f}s."
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=10000)
+    parser.add_argument("--days", type=float, default=365, help="spread post dates over this many days")
+    parser.add_argument("--mean-likes", type=float, default=15)
+    parser.add_argument("--mean-comments", type=float, default=3)
+    parser.add_argument("--max-comments", type=int, default=500)
+    parser.add_argument("--reply-ratio", type=float, default=0.3, help="share of comments that are replies")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--parallel", type=int, default=1, help="batches written concurrently")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--email-domain", default="loadtest.example.com")
+    parser.add_argument("--drop", action="store_true",
+                        help="delete all posts, likes, comments, facets and previously generated users first")
+    args = parser.parse_args()
+    try:
+        asyncio.run(generate(args))
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""Recompute the post_facets counters from blog_posts.
+
+Run from the backend directory: python -m scripts.rebuild_facets
+"""
+import asyncio
+from db import client, db
+from facets import rebuild_facets
+
+
+async def main():
+    count = await rebuild_facets(db)
+    print(f"Rebuilt {count} facet counters.")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+"""Full-text and prefix search over blog posts.
+
+Relevance search uses the weighted text index declared in indexes.py. Type-ahead prefix
+search uses the `search_terms` array (lowercased words of the title and tags) and an
+anchored regex, which MongoDB turns into a range scan on the search_terms index.
+"""
+import re
+
+TEXT_INDEX_WEIGHTS = {"title": 10, "tags": 5, "excerpt": 3, "content": 1}
+
+MIN_PREFIX_LENGTH = 2
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list:
+    return [word.lower() for word in _WORD.findall(text or "")]
+
+
+def search_terms(post: dict) -> list:
+    """The distinct words of a post's title and tags, for prefix search."""
+    words = tokenize(post.get("title"))
+    for tag in post.get("tags") or []:
+        words.extend(tokenize(tag))
+    return sorted(set(words))
+
+
+def prefix_query(q: str):
+    """Query matching posts containing every complete word of q and a word starting with its last.
+
+    Returns None when q has nothing usable to search for.
+    """
+    words = tokenize(q)
+    if not words or (len(words) == 1 and len(words[0]) < MIN_PREFIX_LENGTH):
+        return None
+    *complete, prefix = words
+    clauses = [{"search_terms": {"$regex": "^" + re.escape(prefix)}}]
+    if complete:
+        clauses.insert(0, {"search_terms": {"$all": complete}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
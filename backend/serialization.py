@@ -0,0 +1,115 @@
+"""MongoDB documents to API responses.
+
+The converters below are the single place that turns blog_posts and post_comments
+documents into the shapes of the response models in models/blog.py. Their output is
+trusted: handlers return it in a FastJSONResponse, which skips FastAPI's response_model
+re-validation and encodes with orjson when it is installed (stdlib json otherwise). The
+response_model on each route still documents the shape in the OpenAPI schema.
+"""
+import json
+from datetime import date, datetime
+from bson import ObjectId
+from fastapi import Response
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+
+PREVIEW_LENGTH = 180
+
+
+def content_preview(content) -> str:
+    content = content or ""
+    return content[:PREVIEW_LENGTH] + "..." if len(content) > PREVIEW_LENGTH else content
+
+
+def post_summary(post: dict) -> dict:
+    """A feed card (BlogPostSummary) from a document fetched with FEED_PROJECTION.
+
+    Full documents work too; their preview is then cut here instead of by MongoDB.
+    """
+    preview = post["content_preview"] if "content_preview" in post else content_preview(post.get("content"))
+    return {
+        "id": str(post["_id"]),
+        "type": post.get("type"),
+        "title": post["title"],
+        "excerpt": post["excerpt"],
+        "author": post["author"],
+        "date": post["date"],
+        "category": post["category"],
+        "read_time": post["read_time"],
+        "image": post.get("image"),
+        "tags": post.get("tags") or [],
+        "like_count": post.get("like_count", 0),
+        "comment_count": post.get("comment_count", 0),
+        "content_preview": preview,
+        "document_url": post.get("document_url"),
+        "job_link": post.get("job_link"),
+        "referral_info": post.get("referral_info"),
+    }
+
+
+def post_response(post: dict, likes: list = ()) -> dict:
+    """A full post (BlogPostResponse) with the given recent likes."""
+    return {
+        "id": str(post["_id"]),
+        "type": post.get("type"),
+        "title": post["title"],
+        "excerpt": post["excerpt"],
+        "author": post["author"],
+        "date": post["date"],
+        "category": post["category"],
+        "read_time": post["read_time"],
+        "image": post.get("image"),
+        "tags": post.get("tags") or [],
+        "likes": [
+            {"user_id": like["user_id"], "user_name": like.get("user_name") or "", "liked_at": like.get("liked_at")}
+            for like in likes
+        ],
+        "like_count": post.get("like_count", len(likes)),
+        "comment_count": post.get("comment_count", len(post.get("comments") or [])),
+        "content": post.get("content"),
+        "document_url": post.get("document_url"),
+        "job_link": post.get("job_link"),
+        "referral_info": post.get("referral_info"),
+    }
+
+
+def comment_response(comment: dict) -> dict:
+    """A comment (CommentResponse), with any replies attached under `replies`."""
+    return {
+        "id": str(comment["_id"]),
+        "post_id": str(comment["post_id"]),
+        "parent_id": str(comment["parent_id"]) if comment.get("parent_id") else None,
+        "user_id": comment["user_id"],
+        "user_name": comment["user_name"],
+        "text": comment["text"],
+        "created_at": comment["created_at"],
+        "reply_count": comment.get("reply_count", 0),
+        "replies": [comment_response(reply) for reply in comment.get("replies", [])],
+    }
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def render_json(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response for converter output; FastAPI returns it without re-validating."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return render_json(content)
@@ -0,0 +1,39 @@
+"""Production entry point: uvicorn with one or more worker processes.
+
+    python serve.py
+
+WEB_CONCURRENCY sets the number of workers (default: one per CPU). With more than one,
+CACHE_BROADCAST=1 is set for the workers so their in-process caches stay coherent (see
+broadcast.py). Each worker has its own MongoDB pool, so the cluster sees up to
+WEB_CONCURRENCY * MONGO_MAX_POOL_SIZE connections.
+
+Sending SIGHUP to the supervisor replaces the workers one at a time, starting each new
+worker before the old one is stopped, so a reload never drops the listening socket. A
+stopped worker finishes its in-flight requests for up to GRACEFUL_SHUTDOWN_TIMEOUT seconds.
+SIGTTIN and SIGTTOU add and remove a worker.
+
+Behind a reverse proxy every connection comes from the proxy, so FORWARDED_ALLOW_IPS must
+list the proxy's addresses (render.yaml sets Render's private range). Client addresses are
+then taken from X-Forwarded-For, which admission.py needs to rate limit each client apart.
+"""
+import os
+import uvicorn
+
+
+def main():
+    workers = int(os.getenv("WEB_CONCURRENCY") or os.cpu_count() or 1)
+    if workers > 1:
+        os.environ["CACHE_BROADCAST"] = "1"
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "5000")),
+        workers=workers,
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "20")),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""MongoDB client settings, read once from the environment.
+
+Pool sizes, wire compression and timeouts apply to every connection of the shared client
+in db.py. MONGO_FEED_READ_PREFERENCE applies to the feed, category and search reads only
+(db.feed_db), so those can be served by secondaries on a replica set while writes and
+read-your-own-write paths stay on the primary.
+"""
+import os
+from pymongo import ReadPreference
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+class MongoSettings:
+    def __init__(self, environ=os.environ):
+        self.uri = environ.get("MONGO_URI")
+        self.db_name = environ.get("MONGO_DB")
+        # Connections opened at startup and kept open, so the first requests don't pay for the handshakes
+        self.min_pool_size = int(environ.get("MONGO_MIN_POOL_SIZE", "5"))
+        # Free-tier clusters allow a few hundred connections in total across every instance
+        self.max_pool_size = int(environ.get("MONGO_MAX_POOL_SIZE", "50"))
+        self.max_idle_ms = int(environ.get("MONGO_MAX_IDLE_MS", "300000"))
+        # zlib needs no extra package; zstd and snappy need zstandard / python-snappy
+        self.compressors = environ.get("MONGO_COMPRESSORS", "zlib")
+        self.server_selection_timeout_ms = int(environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+        self.connect_timeout_ms = int(environ.get("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+        self.socket_timeout_ms = int(environ.get("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+        feed_read_preference = environ.get("MONGO_FEED_READ_PREFERENCE", "primary")
+        if feed_read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Unknown MONGO_FEED_READ_PREFERENCE: {feed_read_preference}")
+        self.feed_read_preference = READ_PREFERENCES[feed_read_preference]
+
+    def client_options(self) -> dict:
+        """Keyword arguments for AsyncIOMotorClient."""
+        options = {
+            "minPoolSize": self.min_pool_size,
+            "maxPoolSize": self.max_pool_size,
+            "maxIdleTimeMS": self.max_idle_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+        }
+        if self.compressors:
+            options["compressors"] = self.compressors
+        return options
@@ -0,0 +1,102 @@
+"""Pluggable storage for post images and documents.
+
+MEDIA_STORAGE selects the backend: "cloudinary" uploads to Cloudinary on a worker thread,
+"local" streams uploads to static/blog_images under content-addressed names so the same
+file uploaded twice is stored once. Local storage needs no network, which makes it the
+one to use for offline development and load tests.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from cloudinary_sdk import cloudinary_installed, get_cloudinary
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+BLOG_IMG_DIR = os.path.join(STATIC_DIR, 'blog_images')
+
+MEDIA_UPLOAD_MAX_BYTES = int(os.getenv("MEDIA_UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class MediaStorage(ABC):
+    """Stores an uploaded file and returns the URL it can be fetched from.
+
+    URLs starting with "/" are relative to the API server.
+    """
+
+    @abstractmethod
+    async def save(self, file: UploadFile) -> str:
+        ...
+
+
+class CloudinaryStorage(MediaStorage):
+    def __init__(self, folder: str = "student_hub/posts/"):
+        if not cloudinary_installed():
+            raise RuntimeError("Cloudinary is not configured")
+        self.folder = folder
+
+    async def save(self, file: UploadFile) -> str:
+        if file.size is not None and file.size > MEDIA_UPLOAD_MAX_BYTES:
+            raise UploadTooLarge()
+        # The SDK call is synchronous network I/O; keep it off the event loop
+        upload_result = await run_in_threadpool(
+            get_cloudinary().uploader.upload, file.file, resource_type="auto", folder=self.folder
+        )
+        url = upload_result.get('secure_url')
+        if not url:
+            raise Exception('Cloudinary upload failed')
+        return url
+
+
+class LocalDiskStorage(MediaStorage):
+    def __init__(self, directory: str = BLOG_IMG_DIR, url_prefix: str = "/static/blog_images"):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        os.makedirs(directory, exist_ok=True)
+
+    async def save(self, file: UploadFile) -> str:
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > MEDIA_UPLOAD_MAX_BYTES:
+                        raise UploadTooLarge()
+                    digest.update(chunk)
+                    await run_in_threadpool(out.write, chunk)
+            name = digest.hexdigest() + _extension(file.filename)
+            path = os.path.join(self.directory, name)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+            return f"{self.url_prefix}/{name}"
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _extension(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,10}", ext) else ""
+
+
+@lru_cache(maxsize=None)
+def get_media_storage() -> MediaStorage:
+    backend = os.getenv("MEDIA_STORAGE", "cloudinary" if cloudinary_installed() else "local")
+    if backend == "local":
+        return LocalDiskStorage()
+    if backend == "cloudinary":
+        return CloudinaryStorage()
+    raise RuntimeError(f"Unknown MEDIA_STORAGE backend: {backend}")
@@ -0,0 +1,33 @@
+"""Hot scores stay finite however far a post's date is past the anchor.
+
+Run from the backend directory: python -m unittest discover tests
+"""
+import math
+import unittest
+from datetime import datetime, timedelta
+import hot
+
+
+class HotWeightLimitTest(unittest.TestCase):
+    anchor = datetime(2026, 1, 1)
+
+    def _at_exponent(self, exponent: float) -> datetime:
+        return self.anchor + timedelta(milliseconds=exponent * hot.TAU_MS)
+
+    def test_weight_is_exact_below_the_cap(self):
+        date = self._at_exponent(hot.MAX_WEIGHT_EXPONENT - 1)
+        self.assertAlmostEqual(math.log(hot._weight(date, self.anchor)), hot.MAX_WEIGHT_EXPONENT - 1, places=6)
+
+    def test_weight_is_capped_past_the_float_limit(self):
+        for exponent in (hot.MAX_WEIGHT_EXPONENT, 710, 100000):
+            weight = hot._weight(self._at_exponent(exponent), self.anchor)
+            self.assertEqual(weight, math.exp(hot.MAX_WEIGHT_EXPONENT))
+
+    def test_far_future_post_gets_a_finite_score(self):
+        post = hot.set_hot_fields({"date": datetime(9999, 1, 1), "like_count": 10 ** 6, "comment_count": 10 ** 6},
+                                  self.anchor)
+        self.assertTrue(math.isfinite(post["hot_score"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""LikeBuffer shutdown: toggles must reach MongoDB even when stop() lands mid-flush.
+
+Run from the backend directory: python -m unittest discover tests
+"""
+import asyncio
+import unittest
+from pymongo import InsertOne
+from likes import LikeBuffer
+
+
+class _Result:
+    deleted_count = 0
+
+
+class _Collection:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.ops = []
+
+    async def find_one(self, query, projection=None):
+        return {"_id": query.get("_id"), "like_count": 0} if "_id" in query else None
+
+    async def bulk_write(self, ops, ordered=True):
+        await asyncio.sleep(self.delay)
+        self.ops.extend(ops)
+        return _Result()
+
+
+class _Db:
+    def __init__(self, delay: float):
+        self.post_likes = _Collection(delay)
+        self.blog_posts = _Collection()
+
+
+def _liked(db) -> set:
+    return {(op._doc["post_id"], op._doc["user_id"]) for op in db.post_likes.ops if isinstance(op, InsertOne)}
+
+
+class LikeBufferStopTest(unittest.IsolatedAsyncioTestCase):
+    async def test_stop_during_flush_writes_every_toggle(self):
+        db = _Db(delay=0.2)
+        buffer = LikeBuffer(db, interval_ms=10)
+        buffer.start()
+        await buffer.toggle("p1", {"_id": "u1"})
+        await asyncio.sleep(0.05)  # the flusher is now inside the slow bulk_write
+        self.assertTrue(buffer._flushing)
+        await buffer.toggle("p1", {"_id": "u2"})
+        await buffer.stop()
+        self.assertEqual(_liked(db), {("p1", "u1"), ("p1", "u2")})
+        self.assertEqual(buffer._pending, {})
+
+    async def test_cancelled_flush_keeps_its_batch(self):
+        db = _Db(delay=0.2)
+        buffer = LikeBuffer(db)
+        await buffer.toggle("p1", {"_id": "u1"})
+        flush = asyncio.create_task(buffer.flush())
+        await asyncio.sleep(0.05)
+        flush.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await flush
+        self.assertIn(("p1", "u1"), buffer._pending)
+        db.post_likes.delay = 0
+        await buffer.flush()
+        self.assertEqual(_liked(db), {("p1", "u1")})
+
+
+if __name__ == "__main__":
+    unittest.main()
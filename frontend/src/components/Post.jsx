@@ -58,6 +58,9 @@ const Post = ({ darkMode, setDarkMode }) => {
   const [newComment, setNewComment] = useState('');
   const [commentLoading, setCommentLoading] = useState(false);
   const [searchTerm, setSearchTerm] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const loadMoreRef = useRef();
 
   useEffect(() => {
     if (authLoading) return; // Wait for auth to load
@@ -85,12 +88,48 @@ const Post = ({ darkMode, setDarkMode }) => {
     }
   }, [showModal, modalPost]);
 
+  // Apply pushed likes, comments and new posts instead of refetching the feed
+  const openPostId = useRef(null);
+  openPostId.current = showModal && modalPost ? modalPost.id : null;
+  useEffect(() => {
+    if (!token || !user) return;
+    return postAPI.subscribeToEvents((event) => {
+      if (event.type === 'post.created') {
+        setPostList(prev => (prev.some(p => p.id === event.post.id) ? prev : [{ ...event.post, liked: false }, ...prev]));
+      } else if (event.type === 'post.updated') {
+        const { type, post_id, ...counts } = event;
+        setPostList(prev => prev.map(p => (p.id === post_id ? { ...p, ...counts } : p)));
+        setModalPost(prev => (prev && prev.id === post_id ? { ...prev, ...counts } : prev));
+      } else if (event.type === 'comment.added' && !event.comment.parent_id && event.post_id === openPostId.current) {
+        setModalComments(prev => (prev.some(c => c.id === event.comment.id) ? prev : [...prev, event.comment]));
+      }
+    }, () => initializePost());
+  }, [token, user]);
+
+  // Feed cards only carry summary fields; load the full post when it is opened
+  useEffect(() => {
+    if (showModal && modalPost && modalPost.content === undefined) {
+      postAPI.getPost(modalPost.id, token)
+        .then(full => setModalPost(prev => (prev && prev.id === full.id ? { ...prev, ...full } : prev)))
+        .catch(err => console.error('Error loading post:', err));
+    }
+  }, [showModal, modalPost, token]);
+
+  // Mark which posts of a page the user has liked
+  const withLikeStatus = async (posts) => {
+    if (!user || posts.length === 0) return posts;
+    const { liked = [] } = await postAPI.getLikeStatus(posts.map(post => post.id), token);
+    const likedIds = new Set(liked);
+    return posts.map(post => ({ ...post, liked: likedIds.has(post.id) }));
+  };
+
   const initializePost = async () => {
     try {
       setLoading(true);
       await postAPI.initializePosts(token);
-      const posts = await postAPI.getAllPosts(token);
-      setPostList(posts);
+      const { posts, nextCursor: cursor } = await postAPI.getPostsPage({}, token);
+      setPostList(await withLikeStatus(posts));
+      setNextCursor(cursor);
     } catch (err) {
       console.error('Error initializing post:', err);
       setError('Failed to load posts');
@@ -99,36 +138,52 @@ const Post = ({ darkMode, setDarkMode }) => {
     }
   };
 
+  // Append the next page of the feed, following the cursor the previous page returned
+  const loadMorePosts = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const { posts, nextCursor: cursor } = await postAPI.getPostsPage({ cursor: nextCursor }, token);
+      const page = await withLikeStatus(posts);
+      setPostList(prev => {
+        const seen = new Set(prev.map(p => p.id));
+        return [...prev, ...page.filter(p => !seen.has(p.id))];
+      });
+      setNextCursor(cursor);
+    } catch (err) {
+      console.error('Error loading more posts:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Infinite scroll: load the next page when the end of the grid comes into view
+  useEffect(() => {
+    const sentinel = loadMoreRef.current;
+    if (!sentinel || !nextCursor || typeof IntersectionObserver === 'undefined') return;
+    const observer = new IntersectionObserver((entries) => {
+      if (entries[0].isIntersecting) loadMorePosts();
+    }, { rootMargin: '400px' });
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [nextCursor, loadingMore]);
+
   const handleLike = async (postId) => {
     try {
       if (!user) return;
       const userInfo = { user_id: user._id, user_name: user.name };
-      const result = await postAPI.likePost(postId, userInfo);
-      if (result.liked) {
-        setPostList(prevPosts =>
-          prevPosts.map(post =>
-            post.id === postId
-              ? {
-                  ...post,
-                  likes: [...post.likes, { user_id: userInfo.user_id, user_name: userInfo.user_name }],
-                  like_count: post.like_count + 1
-                }
-              : post
-          )
-        );
-      } else {
-        setPostList(prevPosts =>
-          prevPosts.map(post =>
-            post.id === postId
-              ? {
-                  ...post,
-                  likes: post.likes.filter(like => like.user_id !== userInfo.user_id),
-                  like_count: post.like_count - 1
-                }
-              : post
-          )
-        );
-      }
+      const result = await postAPI.likePost(postId, userInfo, token);
+      setPostList(prevPosts =>
+        prevPosts.map(post =>
+          post.id === postId
+            ? {
+                ...post,
+                liked: result.liked,
+                like_count: result.like_count ?? post.like_count + (result.liked ? 1 : -1)
+              }
+            : post
+        )
+      );
     } catch (err) {
       console.error('Error liking post:', err);
       alert('Failed to like/unlike post');
@@ -137,7 +192,8 @@ const Post = ({ darkMode, setDarkMode }) => {
 
   const isPostLikedByUser = (post) => {
     if (!user) return false;
-    return post.likes.some(like => like.user_id === user._id);
+    if (post.liked !== undefined) return post.liked;
+    return (post.likes || []).some(like => like.user_id === user._id);
   };
 
   const categories = [
@@ -421,7 +477,7 @@ const Post = ({ darkMode, setDarkMode }) => {
                         <span style={{fontWeight:'bold'}}>Referral Info:</span> {post.referral_info}
                       </div>
                     )}
-                    {post.content && <p className="twitter-x-content-preview">{post.content}</p>}
+                    {post.content_preview && <p className="twitter-x-content-preview">{post.content_preview}</p>}
                   </div>
                   <div className="twitter-x-tags">
                     {(post.tags || []).map(tag => (
@@ -451,7 +507,7 @@ const Post = ({ darkMode, setDarkMode }) => {
                       }, 300);
                     }}
                   >
-                    💬 {post.comments ? post.comments.length : 0} Comments
+                    💬 {post.comment_count || 0} Comments
                   </span>
                 </div>
               </article>
@@ -478,7 +534,7 @@ const Post = ({ darkMode, setDarkMode }) => {
                   <div className="twitter-x-text">
                     <h3 className="twitter-x-title">{post.title || 'Sample Post: Getting Started with AI'}</h3>
                     <p className="twitter-x-excerpt">{post.excerpt || 'A quick guide for beginners to dive into the world of AI and ML.'}</p>
-                    <p className="twitter-x-content-preview">{(post.content && post.content.length > 0 ? post.content.slice(0, 180) : 'Machine learning is transforming industries. In this post, we cover the basics, best resources, and tips to start your journey. Whether you\'re a student or a professional, these steps will help you build a strong foundation...')}{post.content && post.content.length > 180 ? '...' : ''}</p>
+                    <p className="twitter-x-content-preview">{(post.content_preview || 'Machine learning is transforming industries. In this post, we cover the basics, best resources, and tips to start your journey. Whether you\'re a student or a professional, these steps will help you build a strong foundation...')}</p>
                     {/* Document link */}
                     <a
                       href={post.document_url || 'https://arxiv.org/pdf/1706.03762.pdf'}
@@ -505,8 +561,8 @@ const Post = ({ darkMode, setDarkMode }) => {
                         className="twitter-x-download"
                       >📄 Download Note</a>
                     )}
-                    {post.type === 'thread' && post.comments && (
-                      <span className="twitter-x-thread-info">💬 {post.comments.length} Comments</span>
+                    {post.type === 'thread' && (
+                      <span className="twitter-x-thread-info">💬 {post.comment_count || 0} Comments</span>
                     )}
                   </div>
                   <div className="twitter-x-tags">
@@ -537,7 +593,7 @@ const Post = ({ darkMode, setDarkMode }) => {
                       }, 300);
                     }}
                   >
-                    💬 {post.comments ? post.comments.length : 0} Comments
+                    💬 {post.comment_count || 0} Comments
                   </span>
                   <button className="twitter-x-readmore-btn" onClick={() => { setModalPost(post); setShowModal(true); }}>Read More</button>
                 </div>
@@ -545,6 +601,13 @@ const Post = ({ darkMode, setDarkMode }) => {
             )
           ))}
         </div>
+        {nextCursor && (
+          <div ref={loadMoreRef} className="post-load-more" style={{textAlign:'center',margin:'1.5rem 0'}}>
+            <button className="twitter-x-readmore-btn" onClick={loadMorePosts} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more posts'}
+            </button>
+          </div>
+        )}
       </div>
       {/* Create Post Modal */}
       {showCreate && (
@@ -602,7 +665,7 @@ const Post = ({ darkMode, setDarkMode }) => {
               </div>
             </div>
             <div className="quick-view-meta">
-              <span>Likes: {modalPost.like_count || 0}</span> | <span>Comments: {modalPost.comments ? modalPost.comments.length : 0}</span>
+              <span>Likes: {modalPost.like_count || 0}</span> | <span>Comments: {modalPost.comment_count || 0}</span>
             </div>
             <div className="quick-view-comments">
               <h4>Comments</h4>
@@ -38,6 +38,18 @@ export const authAPI = {
     return response.json();
   },
 
+  getUsersBatch: async (userIds, token) => {
+    const response = await fetch(`${API_BASE_URL}/auth/users/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`,
+      },
+      body: JSON.stringify({ user_ids: userIds }),
+    });
+    return response.json();
+  },
+
   updateProfile: async (profileData, token) => {
     const response = await fetch(`${API_BASE_URL}/auth/profile`, {
       method: 'PUT',
@@ -79,6 +91,34 @@ export const postAPI = {
     return response.json();
   },
 
+  getPostsPage: async ({ cursor, limit, sort } = {}, token) => {
+    const params = new URLSearchParams();
+    if (cursor) params.set('cursor', cursor);
+    if (limit) params.set('limit', limit);
+    if (sort) params.set('sort', sort);
+    const response = await fetch(`${API_BASE_URL}/blog/posts?${params}`, {
+      headers: {
+        ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+      }
+    });
+    const posts = await response.json();
+    return { posts, nextCursor: response.headers.get('X-Next-Cursor') };
+  },
+
+  searchPosts: async (q, { prefix = false, cursor, limit } = {}, token) => {
+    const params = new URLSearchParams({ q });
+    if (prefix) params.set('prefix', 'true');
+    if (cursor) params.set('cursor', cursor);
+    if (limit) params.set('limit', limit);
+    const response = await fetch(`${API_BASE_URL}/blog/search?${params}`, {
+      headers: {
+        ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+      }
+    });
+    const posts = await response.json();
+    return { posts, nextCursor: response.headers.get('X-Next-Cursor') };
+  },
+
   getPost: async (postId, token) => {
     const response = await fetch(`${API_BASE_URL}/blog/posts/${postId}`, {
       headers: {
@@ -109,6 +149,30 @@ export const postAPI = {
     return response.json();
   },
 
+  getLikeStatus: async (postIds, token) => {
+    const response = await fetch(`${API_BASE_URL}/blog/likes/status`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+      },
+      body: JSON.stringify({ post_ids: postIds }),
+    });
+    return response.json();
+  },
+
+  getPostsBatch: async (postIds, token) => {
+    const response = await fetch(`${API_BASE_URL}/blog/posts/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+      },
+      body: JSON.stringify({ post_ids: postIds }),
+    });
+    return response.json();
+  },
+
   createPost: async (postData, token) => {
     const response = await fetch(`${API_BASE_URL}/blog/posts`, {
       method: 'POST',
@@ -130,6 +194,19 @@ export const postAPI = {
     return data;
   },
 
+  uploadImage: async (file, token) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    const response = await fetch(`${API_BASE_URL}/blog/upload-image`, {
+      method: 'POST',
+      headers: {
+        ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+      },
+      body: formData
+    });
+    return response.json();
+  },
+
   initializePosts: async (token) => {
     const response = await fetch(`${API_BASE_URL}/blog/initialize`, {
       method: 'POST',
@@ -149,6 +226,15 @@ export const postAPI = {
     return response.json();
   },
 
+  // Live updates over Server-Sent Events. Returns a function that closes the stream.
+  // onResync runs when events were missed and whatever is shown should be refetched.
+  subscribeToEvents: (onEvent, onResync) => {
+    const source = new EventSource(`${API_BASE_URL}/blog/events`);
+    source.onmessage = (e) => onEvent(JSON.parse(e.data));
+    source.addEventListener('resync', () => onResync && onResync());
+    return () => source.close();
+  },
+
   addComment: async (postId, comment, token) => {
     const response = await fetch(`${API_BASE_URL}/blog/posts/${postId}/comments`, {
       method: 'POST',